@@ -0,0 +1,147 @@
+"""
+Synthetic dbt manifest generator for benchmarks.
+
+    python benchmarks/generate.py manifest.json --models 10000 --columns 20
+"""
+import argparse
+import json
+import random
+
+from cube_dbt.column import ADAPTER_TYPE_MAPPINGS, TYPE_MAPPINGS
+
+TEST_NAMES = ('unique', 'not_null', 'accepted_values', 'relationships')
+MATERIALIZATIONS = ('table', 'view', 'incremental', 'ephemeral')
+
+def _data_types(adapter_type: str) -> list[str]:
+  return sorted(ADAPTER_TYPE_MAPPINGS.get(adapter_type, TYPE_MAPPINGS))
+
+def generate_manifest(
+  models: int=1000,
+  columns: int=20,
+  tests: int=1,
+  meta: int=2,
+  adapter_type: str='postgres',
+  project: str='bench',
+  seed: int=0
+) -> dict:
+  """
+  Returns a manifest with `models` model nodes of `columns` columns each,
+  `tests` generic tests per column, and `meta` entries in each column's
+  `meta`. Node shapes follow dbt 1.5+ manifests, with the keys cube_dbt
+  doesn't read included, so parsing costs are realistic.
+  """
+  rng = random.Random(seed)
+  data_types = _data_types(adapter_type)
+  nodes = {}
+  for model_index in range(models):
+    name = f'model_{model_index}'
+    unique_id = f'model.{project}.{name}'
+    model_columns = {}
+    for column_index in range(columns):
+      column_name = 'id' if column_index == 0 else f'column_{column_index}'
+      model_columns[column_name] = {
+        'name': column_name,
+        'description': f'Column {column_index} of {name}',
+        'meta': {f'key_{key}': f'value_{rng.randrange(1000)}' for key in range(meta)},
+        'data_type': rng.choice(data_types),
+        'constraints': [],
+        'quote': None,
+        'tags': ['primary_key'] if column_index == 0 and model_index % 2 else [],
+      }
+      for test_index in range(tests):
+        test_name = TEST_NAMES[test_index % len(TEST_NAMES)]
+        test_id = f'test.{project}.{test_name}_{name}_{column_name}_{test_index}'
+        nodes[test_id] = {
+          'resource_type': 'test',
+          'name': f'{test_name}_{name}_{column_name}',
+          'unique_id': test_id,
+          'package_name': project,
+          'path': f'{test_name}_{name}_{column_name}.sql',
+          'original_file_path': f'models/{name}.yml',
+          'raw_code': '{{ test_' + test_name + '(**_dbt_generic_test_kwargs) }}',
+          'test_metadata': {
+            'name': test_name,
+            'kwargs': {'column_name': column_name, 'model': "{{ get_where_subquery(ref('" + name + "')) }}"},
+            'namespace': None,
+          },
+          'depends_on': {'macros': [f'macro.dbt.test_{test_name}'], 'nodes': [unique_id]},
+          'attached_node': unique_id,
+          'column_name': column_name,
+          'config': {'enabled': True, 'severity': 'ERROR', 'tags': []},
+        }
+    group = model_index % 50
+    nodes[unique_id] = {
+      'resource_type': 'model',
+      'name': name,
+      'unique_id': unique_id,
+      'package_name': project,
+      'path': f'marts/group_{group}/{name}.sql',
+      'original_file_path': f'models/marts/group_{group}/{name}.sql',
+      'fqn': [project, 'marts', f'group_{group}', name],
+      'database': 'analytics',
+      'schema': f'marts_{group}',
+      'alias': name,
+      'relation_name': f'"analytics"."marts_{group}"."{name}"',
+      'description': f'Synthetic model {model_index}',
+      'checksum': {'name': 'sha256', 'checksum': '%064x' % rng.getrandbits(256)},
+      'config': {
+        'enabled': True,
+        'materialized': MATERIALIZATIONS[model_index % len(MATERIALIZATIONS)],
+        'tags': ['cube'] if model_index % 3 else [],
+        'meta': {},
+        'persist_docs': {},
+        'on_schema_change': 'ignore',
+      },
+      'tags': [],
+      'columns': model_columns,
+      'meta': {},
+      'raw_code': f'select * from {{{{ ref("stg_{name}") }}}}',
+      'compiled_code': f'select * from "analytics"."staging"."stg_{name}"',
+      'depends_on': {'macros': [], 'nodes': []},
+      'constraints': [],
+      'version': None,
+      'latest_version': None,
+    }
+  return {
+    'metadata': {
+      'dbt_schema_version': 'https://schemas.getdbt.com/dbt/manifest/v10.json',
+      'dbt_version': '1.7.0',
+      'adapter_type': adapter_type,
+    },
+    'nodes': nodes,
+    'sources': {},
+    'macros': {},
+    'docs': {},
+    'exposures': {},
+    'metrics': {},
+  }
+
+def write_manifest(path: str, **params) -> None:
+  with open(path, 'w', encoding='utf-8') as file:
+    json.dump(generate_manifest(**params), file)
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+  parser.add_argument('--columns', type=int, default=20, help='Columns per model')
+  parser.add_argument('--tests', type=int, default=1, help='Tests per column')
+  parser.add_argument('--meta', type=int, default=2, help='Meta entries per column')
+  parser.add_argument('--adapter', default='postgres', help='Adapter type')
+  parser.add_argument('--seed', type=int, default=0)
+
+def main(argv=None) -> None:
+  parser = argparse.ArgumentParser(description='Generate a synthetic dbt manifest')
+  parser.add_argument('output', help='Output path')
+  parser.add_argument('--models', type=int, default=1000, help='Number of models')
+  add_arguments(parser)
+  args = parser.parse_args(argv)
+  write_manifest(
+    args.output,
+    models=args.models,
+    columns=args.columns,
+    tests=args.tests,
+    meta=args.meta,
+    adapter_type=args.adapter,
+    seed=args.seed
+  )
+
+if __name__ == '__main__':
+  main()
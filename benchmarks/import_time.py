@@ -0,0 +1,44 @@
+"""
+Measures how long `import cube_dbt` takes in a fresh interpreter and
+fails if it exceeds the budget.
+
+    python benchmarks/import_time.py --budget 0.05
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Seconds, the fastest of `--repeat` fresh interpreters
+IMPORT_TIME_BUDGET = 0.05
+
+_SCRIPT = '''
+import time
+started_at = time.perf_counter()
+import cube_dbt
+print(time.perf_counter() - started_at)
+'''
+
+def import_time(repeat: int) -> float:
+  env = dict(os.environ)
+  source = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+  env['PYTHONPATH'] = os.pathsep.join(filter(None, [source, env.get('PYTHONPATH')]))
+  return min(
+    float(subprocess.check_output([sys.executable, '-c', _SCRIPT], env=env))
+    for _ in range(repeat)
+  )
+
+def main(argv=None) -> int:
+  parser = argparse.ArgumentParser(description='Measure the import time of cube_dbt')
+  parser.add_argument('--budget', type=float, default=IMPORT_TIME_BUDGET, help='Budget in seconds')
+  parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters to run')
+  args = parser.parse_args(argv)
+  seconds = import_time(args.repeat)
+  print(f'import cube_dbt: {seconds * 1000:.1f} ms (budget {args.budget * 1000:.0f} ms)')
+  if seconds > args.budget:
+    print('Import time is over budget', file=sys.stderr)
+    return 1
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main())
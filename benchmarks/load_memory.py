@@ -0,0 +1,83 @@
+"""
+Compares wall time and peak memory of `Dbt.from_file` read paths on a
+synthetic manifest. Each path runs in a fresh interpreter, sampling
+/proc/self/status (Linux only) for private (RssAnon) and total (VmHWM)
+resident memory.
+
+    python benchmarks/load_memory.py --models 10000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from generate import add_arguments, write_manifest
+
+PATHS = {
+  'read': {},
+  'mmap': {'mmap': True},
+  'stream': {'stream': True},
+  'lean': {'lean': True},
+  'mmap+lean': {'mmap': True, 'lean': True},
+}
+
+_SCRIPT = '''
+import json, sys, threading, time
+from cube_dbt import Dbt
+
+def status(key):
+  with open('/proc/self/status') as file:
+    for line in file:
+      if line.startswith(key):
+        return int(line.split()[1]) * 1024
+
+peak = [0]
+done = threading.Event()
+def sample():
+  while not done.is_set():
+    peak[0] = max(peak[0], status('RssAnon:'))
+    time.sleep(0.001)
+
+thread = threading.Thread(target=sample)
+thread.start()
+started_at = time.perf_counter()
+dbt = Dbt.from_file(sys.argv[1], **json.loads(sys.argv[2]))
+seconds = time.perf_counter() - started_at
+done.set()
+thread.join()
+print(json.dumps({'seconds': seconds, 'peak_anon': peak[0], 'peak_rss': status('VmHWM:')}))
+'''
+
+def measure(manifest_path: str, options: dict) -> dict:
+  output = subprocess.check_output([sys.executable, '-c', _SCRIPT, manifest_path, json.dumps(options)])
+  return json.loads(output)
+
+def main(argv=None) -> None:
+  parser = argparse.ArgumentParser(description='Compare from_file read paths')
+  parser.add_argument('--models', type=int, default=10000, help='Number of models')
+  add_arguments(parser)
+  parser.add_argument('--repeat', type=int, default=3, help='Runs per path, the fastest is kept')
+  args = parser.parse_args(argv)
+  with tempfile.TemporaryDirectory() as directory:
+    manifest_path = os.path.join(directory, 'manifest.json')
+    write_manifest(
+      manifest_path,
+      models=args.models,
+      columns=args.columns,
+      tests=args.tests,
+      meta=args.meta,
+      adapter_type=args.adapter,
+      seed=args.seed
+    )
+    print(f'{os.path.getsize(manifest_path) / 1e6:.1f} MB manifest')
+    for name, options in PATHS.items():
+      runs = [measure(manifest_path, options) for _ in range(args.repeat)]
+      seconds = min(run['seconds'] for run in runs)
+      peak_anon = min(run['peak_anon'] for run in runs)
+      peak_rss = min(run['peak_rss'] for run in runs)
+      print(f'  {name:<10} {seconds:7.3f}s  peak private {peak_anon / 1e6:7.1f} MB  peak RSS {peak_rss / 1e6:7.1f} MB')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,68 @@
+"""
+Measures the memory held by a loaded manifest and the `Model` and
+`Column` objects built from it, per column.
+
+    python benchmarks/memory.py --models 2000 --columns 20
+"""
+import argparse
+import gc
+import os
+import tempfile
+import tracemalloc
+
+from cube_dbt import Dbt
+
+from generate import add_arguments, write_manifest
+
+def _traced_size() -> int:
+  gc.collect()
+  return tracemalloc.get_traced_memory()[0]
+
+def measure(manifest_path: str) -> dict:
+  """
+  Returns the memory added by each stage, per model column. Loading
+  varies by a few percent between runs, so compare the later stages.
+  """
+  tracemalloc.start()
+  try:
+    start = _traced_size()
+    dbt = Dbt.from_file(manifest_path)
+    loaded = _traced_size()
+    dbt._index._build()
+    indexed = _traced_size()
+    models = [(model, model.columns) for model in dbt.models]
+    built = _traced_size()
+  finally:
+    tracemalloc.stop()
+  columns = sum(len(model_columns) for _, model_columns in models)
+  return {
+    'columns': columns,
+    'load': (loaded - start) / columns,
+    'index': (indexed - loaded) / columns,
+    'objects': (built - indexed) / columns,
+  }
+
+def main(argv=None) -> None:
+  parser = argparse.ArgumentParser(description='Measure cube_dbt memory per column')
+  parser.add_argument('--models', type=int, default=2000, help='Number of models')
+  add_arguments(parser)
+  args = parser.parse_args(argv)
+  with tempfile.TemporaryDirectory() as directory:
+    manifest_path = os.path.join(directory, 'manifest.json')
+    write_manifest(
+      manifest_path,
+      models=args.models,
+      columns=args.columns,
+      tests=args.tests,
+      meta=args.meta,
+      adapter_type=args.adapter,
+      seed=args.seed
+    )
+    result = measure(manifest_path)
+  print(f"{result['columns']} columns")
+  print(f"  load                  {result['load']:8.1f} bytes per column")
+  print(f"  indexes               {result['index']:8.1f} bytes per column")
+  print(f"  Model/Column objects  {result['objects']:8.1f} bytes per column")
+
+if __name__ == '__main__':
+  main()
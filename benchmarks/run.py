@@ -0,0 +1,126 @@
+"""
+Times each stage of loading and rendering synthetic manifests, and
+compares the results against stored baselines.
+
+    python benchmarks/run.py --models 1000 10000 100000
+    python benchmarks/run.py --models 1000 --save
+
+Exits with status 1 if a stage is slower than its baseline by more
+than `--tolerance`.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from cube_dbt import Dbt
+
+from generate import add_arguments, write_manifest
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+def _time(function) -> float:
+  start = time.perf_counter()
+  function()
+  return time.perf_counter() - start
+
+def _column_types(dbt: Dbt) -> None:
+  for model in dbt.models:
+    for column in model.columns:
+      if column._column_dict.get('data_type') is not None:
+        column.type
+
+def _dump(dbt: Dbt) -> None:
+  for model in dbt.models:
+    model.as_cube()
+    model.as_dimensions()
+
+def run_stages(manifest_path: str) -> dict:
+  """
+  Runs every stage once on a fresh load and returns their timings in seconds.
+  """
+  timings = {}
+  result = {}
+  timings['from_file'] = _time(lambda: result.setdefault('dbt', Dbt.from_file(manifest_path)))
+  timings['from_file_stream'] = _time(lambda: Dbt.from_file(manifest_path, stream=True))
+  dbt = result['dbt']
+  index = dbt._index
+  timings['build_index'] = _time(index._build)
+  timings['init_models'] = _time(lambda: dbt.models)
+  index.type_resolver.reset()
+  timings['column_type'] = _time(lambda: _column_types(dbt))
+  timings['dump'] = _time(lambda: _dump(dbt))
+  timings['render_cubes'] = _time(dbt.render_cubes)
+  return timings
+
+def benchmark(manifest_path: str, repeat: int) -> dict:
+  runs = [run_stages(manifest_path) for _ in range(repeat)]
+  return {stage: min(run[stage] for run in runs) for stage in runs[0]}
+
+def _case_key(models: int, args) -> str:
+  return f'models={models},columns={args.columns},tests={args.tests},meta={args.meta},adapter={args.adapter}'
+
+def _load_baselines() -> dict:
+  if not os.path.exists(BASELINES_PATH):
+    return {}
+  with open(BASELINES_PATH, 'r', encoding='utf-8') as file:
+    return json.load(file)
+
+def _save_baselines(baselines: dict) -> None:
+  with open(BASELINES_PATH, 'w', encoding='utf-8') as file:
+    json.dump(baselines, file, indent=2, sort_keys=True)
+    file.write('\n')
+
+def main(argv=None) -> int:
+  parser = argparse.ArgumentParser(description='Benchmark cube_dbt on synthetic manifests')
+  parser.add_argument('--models', type=int, nargs='+', default=[1000, 10000], help='Model counts to benchmark')
+  add_arguments(parser)
+  parser.add_argument('--repeat', type=int, default=3, help='Runs per case, the fastest is kept')
+  parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed slowdown over the baseline, as a fraction')
+  parser.add_argument('--save', action='store_true', help='Store the results as the new baselines')
+  args = parser.parse_args(argv)
+
+  baselines = _load_baselines()
+  regressions = []
+  with tempfile.TemporaryDirectory() as directory:
+    for models in args.models:
+      key = _case_key(models, args)
+      manifest_path = os.path.join(directory, f'manifest_{models}.json')
+      write_manifest(
+        manifest_path,
+        models=models,
+        columns=args.columns,
+        tests=args.tests,
+        meta=args.meta,
+        adapter_type=args.adapter,
+        seed=args.seed
+      )
+      size = os.path.getsize(manifest_path)
+      timings = benchmark(manifest_path, args.repeat)
+      os.unlink(manifest_path)
+
+      print(f'{key} ({size / 1e6:.1f} MB)')
+      baseline = baselines.get(key, {})
+      for stage, seconds in timings.items():
+        line = f'  {stage:<18} {seconds:9.4f}s'
+        if stage in baseline:
+          ratio = seconds / baseline[stage] if baseline[stage] else 1.0
+          line += f'  {ratio:5.2f}x baseline'
+          if ratio > 1 + args.tolerance:
+            line += '  REGRESSION'
+            regressions.append((key, stage))
+        print(line)
+      if args.save:
+        baselines[key] = {stage: round(seconds, 6) for stage, seconds in timings.items()}
+
+  if args.save:
+    _save_baselines(baselines)
+  if regressions:
+    print(f'{len(regressions)} stage(s) slower than baseline', file=sys.stderr)
+    return 1
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Compares the per-worker cost of loading one manifest in forked worker
+processes: each worker parsing it, attaching to a snapshot shared by
+the parent (`Dbt.share`/`Dbt.attach`), or inheriting the parent's
+objects (`Dbt.prefork`). Each worker renders all cubes, then reports
+its load time and private memory from /proc/self/smaps_rollup (Linux only).
+
+    python benchmarks/workers.py --models 10000 --workers 4
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from cube_dbt import Dbt
+from generate import add_arguments, write_manifest
+
+def _private_bytes() -> int:
+  total = 0
+  with open('/proc/self/smaps_rollup') as file:
+    for line in file:
+      if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+        total += int(line.split()[1]) * 1024
+  return total
+
+def _run_workers(workers: int, load) -> list:
+  """
+  Forks `workers` processes that each call `load()`, render all cubes,
+  and report their load time and private memory.
+  """
+  pipes = []
+  for _ in range(workers):
+    read_fd, write_fd = os.pipe()
+    if os.fork() == 0:
+      os.close(read_fd)
+      started_at = time.perf_counter()
+      dbt = load()
+      seconds = time.perf_counter() - started_at
+      dbt.render_cubes()
+      with os.fdopen(write_fd, 'w') as file:
+        file.write(json.dumps({'seconds': seconds, 'private': _private_bytes()}))
+      os._exit(0)
+    os.close(write_fd)
+    pipes.append(read_fd)
+  results = []
+  for read_fd in pipes:
+    with os.fdopen(read_fd) as file:
+      results.append(json.loads(file.read()))
+  for _ in pipes:
+    os.wait()
+  return results
+
+def main(argv=None) -> None:
+  parser = argparse.ArgumentParser(description='Compare ways to load a manifest in worker processes')
+  parser.add_argument('--models', type=int, default=10000, help='Number of models')
+  parser.add_argument('--workers', type=int, default=4, help='Number of worker processes')
+  add_arguments(parser)
+  args = parser.parse_args(argv)
+  with tempfile.TemporaryDirectory() as directory:
+    manifest_path = os.path.join(directory, 'manifest.json')
+    write_manifest(
+      manifest_path,
+      models=args.models,
+      columns=args.columns,
+      tests=args.tests,
+      meta=args.meta,
+      adapter_type=args.adapter,
+      seed=args.seed
+    )
+    print(f'{os.path.getsize(manifest_path) / 1e6:.1f} MB manifest, {args.workers} workers')
+
+    modes = {}
+    modes['parse'] = _run_workers(args.workers, lambda: Dbt.from_file(manifest_path, lean=True))
+    with Dbt.from_file(manifest_path, lean=True).share() as shared:
+      modes['attach'] = _run_workers(args.workers, lambda: Dbt.attach(shared.name))
+    parent = Dbt.from_file(manifest_path, lean=True).prefork()
+    modes['prefork'] = _run_workers(args.workers, lambda: parent)
+
+    for name, results in modes.items():
+      seconds = max(result['seconds'] for result in results)
+      private = sum(result['private'] for result in results) / len(results)
+      print(f'  {name:<8} load {seconds:7.3f}s  private per worker {private / 1e6:7.1f} MB')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,222 @@
+import hashlib
+import os
+import tempfile
+
+from cube_dbt import jsonio
+
+# Bump whenever the projection, the test index layout, or the file layout changes
+FORMAT_VERSION = 4
+
+# Snapshots are JSON, never pickle, so a writable cache directory or shared
+# memory segment can't be used to run code in the processes reading it.
+# A snapshot is a one-line JSON header (the format and the validators of
+# its source) followed by the JSON body (the projected manifest and its
+# test index), so stale snapshots are rejected without parsing the body.
+
+def dumps_snapshot(snapshot: dict, **header) -> bytes:
+  """
+  Serializes a snapshot (a projected manifest and its test index) and
+  the `header` values in the format stored by `ManifestCache`.
+  """
+  return jsonio.dumps({'format': FORMAT_VERSION, **header}) + b'\n' + jsonio.dumps(snapshot)
+
+def _loads_header(line: bytes):
+  try:
+    header = jsonio.loads(line)
+  except ValueError:
+    return None
+  if not isinstance(header, dict) or header.get('format') != FORMAT_VERSION:
+    return None
+  return header
+
+def _loads_body(data: bytes):
+  try:
+    body = jsonio.loads(data)
+  except ValueError:
+    return None
+  if not isinstance(body, dict) or 'manifest' not in body or 'test_index' not in body:
+    return None
+  return body
+
+def loads_snapshot(data: bytes):
+  """
+  Deserializes a snapshot from `dumps_snapshot`, with its header values.
+  Returns `None` if the data is invalid or from another format version.
+  """
+  line, _, data = data.partition(b'\n')
+  header = _loads_header(line)
+  if header is None:
+    return None
+  body = _loads_body(data)
+  if body is None:
+    return None
+  return {**header, **body}
+
+
+class CachedSnapshot:
+  """
+  An open snapshot file whose header has been read and whose body is
+  read on demand, e.g. once the server confirms it's still current.
+  """
+  def __init__(self, file, header: dict) -> None:
+    self._file = file
+    self.header = header
+    pass
+
+  def read(self):
+    """
+    Returns the snapshot with its header values, or `None` if the body
+    is invalid, and closes the file.
+    """
+    try:
+      body = _loads_body(self._file.read())
+    except OSError:
+      body = None
+    finally:
+      self.close()
+    if body is None:
+      return None
+    return {**self.header, **body}
+
+  def close(self) -> None:
+    self._file.close()
+
+class HashingReader:
+  """
+  File-like wrapper that hashes everything read through it, so the
+  manifest is fingerprinted during the same pass that parses it.
+  """
+  def __init__(self, file) -> None:
+    self._file = file
+    self._hash = hashlib.blake2b()
+    pass
+
+  def read(self, size: int=-1) -> bytes:
+    data = self._file.read(size)
+    self._hash.update(data)
+    return data
+
+  def hexdigest(self) -> str:
+    return self._hash.hexdigest()
+
+def file_digest(path: str) -> str:
+  with open(path, 'rb') as file:
+    reader = HashingReader(file)
+    while reader.read(1 << 20):
+      pass
+  return reader.hexdigest()
+
+class ManifestCache:
+  """
+  Directory of projected-manifest snapshots.
+
+  A snapshot of a manifest file is reused only if the file's size, mtime,
+  and content hash all match the ones it was built from. A snapshot of a
+  manifest URL keeps the response's `ETag` and `Last-Modified` headers
+  for conditional requests. Snapshots are written to a temporary file and
+  atomically renamed into place, so any number of processes can warm the
+  same directory concurrently; readers see either a complete snapshot
+  or none.
+  """
+  def __init__(self, directory: str) -> None:
+    self.directory = directory
+    os.makedirs(directory, exist_ok=True)
+    pass
+
+  def _snapshot_path(self, source: str) -> str:
+    key = hashlib.sha1(source.encode('utf-8')).hexdigest()
+    return os.path.join(self.directory, f'{key}.snapshot')
+
+  def _open(self, source: str):
+    """
+    Opens the snapshot of a source and reads its header only.
+    Returns a `CachedSnapshot`, or `None` if there's no valid one.
+    """
+    try:
+      file = open(self._snapshot_path(source), 'rb')
+    except OSError:
+      return None
+    try:
+      header = _loads_header(file.readline())
+    except OSError:
+      header = None
+    if header is None:
+      file.close()
+      return None
+    return CachedSnapshot(file, header)
+
+  def _write(self, source: str, snapshot: dict, header: dict) -> None:
+    data = dumps_snapshot(snapshot, **header)
+    fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'wb') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+      os.replace(temp_path, self._snapshot_path(source))
+    except BaseException:
+      try:
+        os.unlink(temp_path)
+      except OSError:
+        pass
+      raise
+
+  def load(self, manifest_path: str):
+    """
+    Returns the snapshot for a manifest file, or `None` if it is missing
+    or stale. The body is only parsed once the header matches.
+    """
+    stat = os.stat(manifest_path)
+    cached = self._open(os.path.abspath(manifest_path))
+    if cached is None:
+      return None
+    header = cached.header
+    if (
+      header.get('size') != stat.st_size or
+      header.get('mtime') != stat.st_mtime_ns or
+      header.get('digest') != file_digest(manifest_path)
+    ):
+      cached.close()
+      return None
+    return cached.read()
+
+  def save(self, manifest_path: str, stat: os.stat_result, digest: str, manifest: dict, test_index: dict) -> None:
+    """
+    Stores a snapshot of a manifest file, unless the file changed since
+    `stat` was taken.
+    """
+    current = os.stat(manifest_path)
+    if current.st_size != stat.st_size or current.st_mtime_ns != stat.st_mtime_ns:
+      return
+    self._write(
+      os.path.abspath(manifest_path),
+      {'manifest': manifest, 'test_index': test_index},
+      {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'digest': digest}
+    )
+
+  def load_url(self, manifest_url: str):
+    """
+    Returns the last snapshot for a manifest URL as a `CachedSnapshot`,
+    or `None`. The caller revalidates it with a conditional request,
+    using the `etag` and `last_modified` of its header, and only reads
+    the body if it's still current.
+    """
+    cached = self._open(manifest_url)
+    if cached is not None and 'etag' not in cached.header:
+      cached.close()
+      return None
+    return cached
+
+  def save_url(self, manifest_url: str, headers: dict, manifest: dict, test_index: dict) -> None:
+    """
+    Stores a snapshot of a manifest URL along with its validators.
+    Responses without `ETag` or `Last-Modified` can't be revalidated
+    and are not stored.
+    """
+    if not headers.get('etag') and not headers.get('last_modified'):
+      return
+    self._write(
+      manifest_url,
+      {'manifest': manifest, 'test_index': test_index},
+      {'etag': headers.get('etag'), 'last_modified': headers.get('last_modified')}
+    )
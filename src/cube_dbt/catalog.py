@@ -0,0 +1,79 @@
+import sys
+
+
+def catalog_index(catalog: dict) -> dict:
+  """
+  Indexes the model columns of a parsed catalog.json, keeping only their
+  name, warehouse type, and comment, by model unique_id and lowercased
+  column name, in the warehouse's column order:
+  {
+    'model.project.model_name': {
+      'column_name': {'name': 'COLUMN_NAME', 'data_type': 'NUMBER', 'description': ''}
+    }
+  }
+  """
+  intern = sys.intern
+  index = {}
+  for unique_id, node in catalog.get('nodes', {}).items():
+    if not unique_id.startswith('model.'):
+      continue
+    columns = sorted(node.get('columns', {}).values(), key=lambda column: column.get('index') or 0)
+    index[unique_id] = {
+      column['name'].lower(): {
+        'name': intern(column['name']),
+        'data_type': intern(column['type']),
+        'description': column.get('comment') or '',
+      }
+      for column in columns
+      if column.get('name') and column.get('type')
+    }
+  return index
+
+def apply_catalog(node: dict, catalog_columns: dict, type_resolver, add_columns: bool=False) -> tuple:
+  """
+  Fills the missing data_types of a model node's columns with the
+  warehouse types of its catalog columns, matched case-insensitively by
+  name. Types the resolver doesn't know are left out, so those columns
+  stay strings. With `add_columns`, columns found only in the catalog
+  are added after the documented ones.
+
+  Returns the node, or a copy of it if anything changed, and the
+  number of columns filled and added. The node itself is never modified.
+  """
+  if not catalog_columns:
+    return node, 0, 0
+  columns = {}
+  seen = set()
+  filled = 0
+  for key, column in node.get('columns', {}).items():
+    name = column.get('name', key).lower()
+    seen.add(name)
+    catalog_column = catalog_columns.get(name)
+    if (
+      column.get('data_type') is None and
+      catalog_column is not None and
+      type_resolver.resolve(catalog_column['data_type']) is not None
+    ):
+      column = {**column, 'data_type': catalog_column['data_type']}
+      filled += 1
+    columns[key] = column
+
+  added = 0
+  if add_columns:
+    for name, catalog_column in catalog_columns.items():
+      if name in seen or catalog_column['name'] in columns:
+        continue
+      column = {
+        'name': catalog_column['name'],
+        'description': catalog_column['description'],
+        'meta': {},
+        'tags': [],
+      }
+      if type_resolver.resolve(catalog_column['data_type']) is not None:
+        column['data_type'] = catalog_column['data_type']
+      columns[catalog_column['name']] = column
+      added += 1
+
+  if not filled and not added:
+    return node, 0, 0
+  return {**node, 'columns': columns}, filled, added
@@ -0,0 +1,49 @@
+import argparse
+import sys
+
+from cube_dbt.dbt import Dbt
+
+def _format_size(size: int) -> str:
+  if size < 1024:
+    return f'{size} B'
+  for unit in ['KB', 'MB', 'GB']:
+    size /= 1024
+    if size < 1024 or unit == 'GB':
+      return f'{size:.1f} {unit}'
+
+def preprocess(args: argparse.Namespace) -> int:
+  source = sys.stdin.buffer if args.manifest == '-' else args.manifest
+  target = sys.stdout.buffer if args.output == '-' else args.output
+  stats = Dbt.preprocess(source, target, paths=args.path, tags=args.tag, names=args.name)
+
+  input_bytes = stats['input_bytes']
+  output_bytes = stats['output_bytes']
+  reduction = 100 * (1 - output_bytes / input_bytes) if input_bytes else 0
+  print(
+    f"Wrote {stats['models']} models and {stats['tests']} tests: "
+    f"{_format_size(input_bytes)} -> {_format_size(output_bytes)} ({reduction:.1f}% smaller) "
+    f"in {stats['total_seconds']:.2f}s (parse {stats['parse_seconds']:.2f}s)",
+    file=sys.stderr
+  )
+  return 0
+
+def main(argv: list[str]=None) -> int:
+  parser = argparse.ArgumentParser(prog='cube-dbt', description='dbt integration for Cube')
+  commands = parser.add_subparsers(dest='command', required=True)
+
+  preprocess_parser = commands.add_parser(
+    'preprocess',
+    help='write a minimal manifest with only the models, tests, and keys cube_dbt reads'
+  )
+  preprocess_parser.add_argument('manifest', help="path to manifest.json, or '-' for stdin")
+  preprocess_parser.add_argument('output', help="path to the output file, or '-' for stdout")
+  preprocess_parser.add_argument('--path', action='append', default=[], help='keep models under this path (repeatable)')
+  preprocess_parser.add_argument('--tag', action='append', default=[], help='keep models with this tag (repeatable)')
+  preprocess_parser.add_argument('--name', action='append', default=[], help='keep the model with this name (repeatable)')
+  preprocess_parser.set_defaults(handler=preprocess)
+
+  args = parser.parse_args(argv)
+  return args.handler(args)
+
+if __name__ == '__main__':
+  sys.exit(main())
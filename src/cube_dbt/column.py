@@ -1,5 +1,8 @@
+import hashlib
+import json
 import re
 
+from cube_dbt import stats
 from cube_dbt.dump import dump
 
 # As of 2024-10-17, the valid "Dimension Types" listed on
@@ -191,13 +194,129 @@ TYPE_MAPPINGS = {
   **REDSHIFT_TYPE_MAPPINGS,
   **SNOWFLAKE_TYPE_MAPPINGS,
 }
+# dbt adapter_type => mappings that take precedence over TYPE_MAPPINGS
+ADAPTER_TYPE_MAPPINGS = {
+  "bigquery": BIGQUERY_TYPE_MAPPINGS,
+  "redshift": REDSHIFT_TYPE_MAPPINGS,
+  "snowflake": SNOWFLAKE_TYPE_MAPPINGS,
+}
+
+_WHITESPACE = re.compile(r"\s+")
+_OPENING_BRACKETS = {"(": ")", "<": ">"}
+
+def normalize_type(data_type: str) -> str:
+  """
+  Downcases a data_type and removes extra information: parameters like
+  `numeric(38,0)` and (nested) element types like `array<struct<a int64>>`.
+  Text after the parameters is kept, e.g. `timestamp(3) with time zone`
+  becomes `timestamp with time zone`.
+  """
+  result = []
+  closing = []
+  for char in data_type.lower():
+    if char in _OPENING_BRACKETS:
+      closing.append(_OPENING_BRACKETS[char])
+    elif closing and char == closing[-1]:
+      closing.pop()
+    elif not closing:
+      result.append(char)
+  return _WHITESPACE.sub(" ", "".join(result)).strip()
+
+
+_CUSTOM_TYPE_MAPPINGS = {}
+_RESOLVERS = {}
+
+def register_type_mapping(data_type: str, cube_type: str, adapter_type: str = None) -> None:
+  """
+  Maps a data_type to a Cube type for all adapters, or only for `adapter_type`.
+  Custom mappings take precedence over the built-in ones.
+  """
+  if cube_type not in VALID_DIMENSION_TYPES:
+    raise ValueError(f"Unknown Cube type: {cube_type}")
+  adapter_type = adapter_type.lower() if adapter_type else None
+  _CUSTOM_TYPE_MAPPINGS.setdefault(adapter_type, {})[normalize_type(data_type)] = cube_type
+  for resolver in _RESOLVERS.values():
+    resolver.reset()
+
+
+class TypeResolver:
+  """
+  Resolves data_type values to Cube types using the mappings of one
+  dbt adapter. Results are memoized per raw data_type, so each distinct
+  type is normalized once no matter how many columns use it.
+  """
+  def __init__(self, adapter_type: str = None) -> None:
+    self.adapter_type = adapter_type.lower() if adapter_type else None
+    self._mappings = None
+    self._cache = {}
+    self._digest = None
+    pass
+
+  @staticmethod
+  def for_adapter(adapter_type: str = None) -> 'TypeResolver':
+    """
+    Returns the resolver shared by all columns of an adapter.
+    """
+    key = adapter_type.lower() if adapter_type else None
+    resolver = _RESOLVERS.get(key)
+    if resolver is None:
+      resolver = _RESOLVERS.setdefault(key, TypeResolver(key))
+    return resolver
+
+  def reset(self) -> None:
+    self._mappings = None
+    self._cache = {}
+    self._digest = None
+
+  def digest(self) -> str:
+    """
+    Hash of the effective mappings, identifying this resolver's results.
+    """
+    if self._digest is None:
+      self._init_mappings()
+      data = json.dumps(sorted(self._mappings.items()), separators=(',', ':'))
+      self._digest = hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+    return self._digest
+
+  def _init_mappings(self) -> None:
+    if self._mappings is None:
+      self._mappings = {
+        **TYPE_MAPPINGS,
+        **ADAPTER_TYPE_MAPPINGS.get(self.adapter_type, {}),
+        **_CUSTOM_TYPE_MAPPINGS.get(None, {}),
+        **_CUSTOM_TYPE_MAPPINGS.get(self.adapter_type, {}),
+      }
+
+  def resolve(self, data_type: str):
+    """
+    Returns the Cube type for a data_type, or `None` if it's unknown.
+    """
+    try:
+      cube_data_type = self._cache[data_type]
+    except KeyError:
+      pass
+    else:
+      stats.count('type_cache_hits')
+      return cube_data_type
+    stats.count('type_cache_misses')
+    self._init_mappings()
+    source_data_type = normalize_type(data_type)
+    cube_data_type = self._mappings.get(source_data_type, source_data_type)
+    if cube_data_type not in VALID_DIMENSION_TYPES:
+      cube_data_type = None
+    self._cache[data_type] = cube_data_type
+    return cube_data_type
 
 
 class Column:
-  def __init__(self, model_name: str, column_dict: dict, tests: list = None) -> None:
+  # Projects can have hundreds of thousands of columns, so they don't get a `__dict__`
+  __slots__ = ('_model_name', '_column_dict', '_tests', '_type_resolver')
+
+  def __init__(self, model_name: str, column_dict: dict, tests: list = None, type_resolver: TypeResolver = None) -> None:
     self._model_name = model_name
     self._column_dict = column_dict
-    self._tests = tests or []
+    self._tests = tests or ()
+    self._type_resolver = type_resolver or TypeResolver.for_adapter()
     pass
   
   def __repr__(self) -> str:
@@ -217,19 +336,13 @@ class Column:
   
   @property
   def type(self) -> str:
-    if not 'data_type' in self._column_dict or self._column_dict['data_type'] == None:
+    data_type = self._column_dict.get('data_type')
+    if data_type == None:
       return 'string'
 
-    # Normalize the data_type value, downcasing it, and removing extra information.
-    source_data_type = re.sub(r"<.*>", "", re.sub(r"\([^\)]*\)", "", self._column_dict["data_type"].lower()))
-
-    if source_data_type in TYPE_MAPPINGS:
-      cube_data_type = TYPE_MAPPINGS[source_data_type]
-    else:
-      cube_data_type = source_data_type
-
-    if cube_data_type not in VALID_DIMENSION_TYPES:
-      raise RuntimeError(f"Unknown column type of {self._model_name}.{self.name}: {self._column_dict['data_type']}")
+    cube_data_type = self._type_resolver.resolve(data_type)
+    if cube_data_type is None:
+      raise RuntimeError(f"Unknown column type of {self._model_name}.{self.name}: {data_type}")
 
     return cube_data_type
 
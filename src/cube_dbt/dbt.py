@@ -1,114 +1,718 @@
-try:
-    import orjson as json
-    # orjson.loads() requires bytes, returns dict
-    _USE_ORJSON = True
-except ImportError:
-    import json
-    _USE_ORJSON = False
-
-from urllib.request import urlopen
+import io
+import os
+import time
+
+from cube_dbt import jsonio, stats
+from cube_dbt.catalog import catalog_index
+from cube_dbt.index import ManifestIndex, is_selected
+from cube_dbt.manifest import TEST_KEYS, CountingReader, project_manifest, project_model, project_node, stream_manifest
+from cube_dbt.diff import ManifestDiff, load_state, save_state
+from cube_dbt.federation import merge_manifests, name_collisions
+from cube_dbt.dump import SafeString, dump
 from cube_dbt.model import Model
-    
+from cube_dbt.render_cache import DEFAULT_MAX_BYTES, RenderCache
+
+# Chunks per worker process, so uneven models still balance out
+_CHUNKS_PER_PROCESS = 4
+
+def _node_selector(paths: list[str], tags: list[str], names: list[str]):
+  """
+  Returns a `select(node)` callback for `stream_manifest` that keeps
+  selected models and the parts of test nodes needed for the test index.
+  """
+  def select(node: dict):
+    resource_type = node.get('resource_type')
+    if resource_type == 'model':
+      return node if is_selected(node, paths, tags, names) else None
+    if resource_type == 'test' and node.get('test_metadata'):
+      return {key: node[key] for key in TEST_KEYS if key in node}
+    return None
+  return select
+
+def _projected_selector(paths: list[str], tags: list[str], names: list[str]):
+  """
+  Returns a `select(node)` callback for `stream_manifest` that keeps
+  projected copies of selected models and of test nodes.
+  """
+  def select(node: dict):
+    projected = project_node(node)
+    if (
+      projected is not None and
+      projected['resource_type'] == 'model' and
+      not is_selected(projected, paths, tags, names)
+    ):
+      return None
+    return projected
+  return select
+
+def _load_mapped(manifest_path: str) -> tuple:
+  """
+  Parses a manifest file with orjson straight from a read-only memory
+  map, backed by the page cache. Returns the manifest and the file size.
+  """
+  import mmap
+  with open(manifest_path, 'rb') as file:
+    size = os.fstat(file.fileno()).st_size
+    if not size:
+      # Empty files can't be mapped
+      return jsonio.loads(b''), 0
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+      with memoryview(mapped) as view:
+        return jsonio.json_module().loads(view), size
+
+def _load_catalog(catalog, timeout: float, retries: int, backoff: float) -> dict:
+  """
+  Reads a catalog.json from a path, URL, or file object and returns
+  its index (see `catalog_index`), releasing the rest of it.
+  """
+  with stats.stage('load_catalog') as stage:
+    if hasattr(catalog, 'read'):
+      data = catalog.read()
+    elif isinstance(catalog, str) and catalog.startswith(('http://', 'https://')):
+      from cube_dbt.fetch import fetch
+      data, _ = fetch(catalog, lambda file: file.read(), timeout=timeout, retries=retries, backoff=backoff)
+    else:
+      with open(catalog, 'rb') as file:
+        data = file.read()
+    stage.count('bytes_read', len(data))
+    index = catalog_index(jsonio.loads(data))
+    stage.count('catalog_models', len(index))
+  return index
+
+def _render_chunk(chunk: tuple) -> str:
+  """
+  Renders the cubes of a chunk of models in a worker process. A chunk
+  holds projected nodes with their test index entries and skipped
+  columns, and the parent's type resolver.
+  """
+  models, type_resolver = chunk
+  return dump(list(
+    Model(node, tests, type_resolver)._as_cube_with_dimensions(skip)
+    for node, tests, skip in models
+  ))
+
+
 class Dbt:
-  def __init__(self, manifest: dict) -> None:
+  def __init__(self, manifest: dict, index: ManifestIndex = None) -> None:
     self.manifest = manifest
     self.paths = ''
     self.tags = []
     self.names = []
+    self._index = index or ManifestIndex(manifest)
+    self._selection = None
     self._models = None
-    self._test_index = None
     pass
 
   @staticmethod
-  def from_file(manifest_path: str) -> 'Dbt':
-    if _USE_ORJSON:
+  def from_file(manifest_path, stream: bool=False, paths: list[str]=[], tags: list[str]=[], names: list[str]=[], cache_dir: str=None, lean: bool=False, mmap: bool=False, catalog=None, catalog_columns: bool=False) -> 'Dbt':
+    """
+    Loads a manifest from a path or a file-like object.
+
+    With `stream=True`, the manifest is read incrementally: only model
+    and test nodes are kept, and the `paths`, `tags`, and `names`
+    filters are applied as each node is decoded, so non-matching nodes
+    are dropped right away instead of being held for the object's lifetime.
+
+    With `lean=True`, only the keys cube_dbt reads are kept (see
+    `project_node`) and the rest of the parsed manifest is released
+    right after loading; test nodes are dropped once the test index is
+    built. The `manifest` attribute then holds that projection.
+
+    With `cache_dir`, a snapshot of the projected manifest and its test
+    index is stored in that directory and reused by later loads of the
+    same, unchanged manifest file. Those loads are always lean.
+
+    With `mmap=True` and orjson installed, a manifest path is parsed
+    from a read-only memory map instead of a copy read into memory, so
+    processes loading the same file share its pages. Ignored for file
+    objects and streaming loads.
+
+    With `catalog`, a path, URL, or file object of the catalog.json
+    generated by `dbt docs generate`, the catalog is read on another
+    thread while the manifest loads. Columns without a `data_type` get
+    their warehouse type from it, and with `catalog_columns=True`,
+    columns found only in the warehouse are added to the models too.
+    """
+    if catalog is not None:
+      return Dbt._with_catalog(
+        lambda: Dbt.from_file(manifest_path, stream, paths, tags, names, cache_dir, lean, mmap),
+        catalog,
+        catalog_columns
+      )
+    if cache_dir is not None:
+      if hasattr(manifest_path, 'read'):
+        raise ValueError('cache_dir requires a manifest path, not a file object')
+      return Dbt._from_cache(manifest_path, cache_dir, stream).filter(paths, tags, names)
+    with stats.stage('from_file') as stage:
+      if stream:
+        select = (_projected_selector if lean else _node_selector)(paths, tags, names)
+        if hasattr(manifest_path, 'read'):
+          reader = CountingReader(manifest_path)
+          manifest = stream_manifest(reader, select)
+        else:
+          with open(manifest_path, 'rb') as file:
+            reader = CountingReader(file)
+            manifest = stream_manifest(reader, select)
+        stage.count('bytes_read', reader.bytes_read)
+      else:
+        if mmap and jsonio.use_orjson() and not hasattr(manifest_path, 'read'):
+          manifest, size = _load_mapped(manifest_path)
+          stage.count('bytes_read', size)
+        else:
+          if hasattr(manifest_path, 'read'):
+            data = manifest_path.read()
+          elif jsonio.use_orjson():
+            with open(manifest_path, 'rb') as file:
+              data = file.read()
+          else:
+            with open(manifest_path, 'r', encoding='utf-8') as file:
+              data = file.read()
+          stage.count('bytes_read', len(data))
+          manifest = jsonio.loads(data)
+          del data
+        if lean:
+          manifest = project_manifest(manifest)
+      stage.count('nodes', len(manifest['nodes']))
+    if lean:
+      return Dbt._from_snapshot(Dbt._snapshot(manifest)).filter(paths, tags, names)
+    return Dbt(manifest).filter(paths, tags, names)
+
+  @staticmethod
+  def _with_catalog(load, catalog, catalog_columns: bool, timeout: float=60.0, retries: int=3, backoff: float=0.5) -> 'Dbt':
+    """
+    Runs `load` while the catalog is read and indexed on another
+    thread, then joins the catalog to the loaded models.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=1) as executor:
+      future = executor.submit(_load_catalog, catalog, timeout, retries, backoff)
+      dbt = load()
+      dbt._index.set_catalog(future.result(), catalog_columns)
+    return dbt
+
+  @staticmethod
+  def _read_projected(file, stream: bool) -> dict:
+    if stream:
+      return stream_manifest(file, project_node)
+    return project_manifest(jsonio.loads(file.read()))
+
+  @staticmethod
+  def _snapshot(manifest: dict) -> dict:
+    """
+    Builds the test index of a projected manifest and returns both,
+    without the test nodes that are only needed to build the index.
+    """
+    index = ManifestIndex(manifest)
+    index.build_test_index()
+    manifest['nodes'] = {
+      key: node for key, node in manifest['nodes'].items()
+      if node['resource_type'] == 'model'
+    }
+    return {'manifest': manifest, 'test_index': index.test_index}
+
+  @staticmethod
+  def _from_snapshot(snapshot: dict) -> 'Dbt':
+    index = ManifestIndex(snapshot['manifest'])
+    index.test_index = snapshot['test_index']
+    return Dbt(snapshot['manifest'], index)
+
+  @staticmethod
+  def _from_cache(manifest_path: str, cache_dir: str, stream: bool) -> 'Dbt':
+    with stats.stage('from_file') as stage:
+      from cube_dbt.cache import HashingReader, ManifestCache
+      cache = ManifestCache(cache_dir)
+      snapshot = cache.load(manifest_path)
+      if snapshot is None:
+        stage.count('manifest_cache_misses')
+        stat = os.stat(manifest_path)
+        with open(manifest_path, 'rb') as file:
+          counter = CountingReader(file)
+          reader = HashingReader(counter)
+          snapshot = Dbt._snapshot(Dbt._read_projected(reader, stream))
+        stage.count('bytes_read', counter.bytes_read)
+        cache.save(manifest_path, stat, reader.hexdigest(), snapshot['manifest'], snapshot['test_index'])
+      else:
+        stage.count('manifest_cache_hits')
+      stage.count('nodes', len(snapshot['manifest']['nodes']))
+    return Dbt._from_snapshot(snapshot)
+
+  @staticmethod
+  def preprocess(manifest_path, output_path, paths: list[str]=[], tags: list[str]=[], names: list[str]=[]) -> dict:
+    """
+    Streams a full manifest and writes a minimal one with only the
+    selected models, the tests attached to them, and the keys cube_dbt
+    reads. Both arguments accept a path or a file-like object.
+    Returns size, node count, and timing stats.
+    """
+    started_at = time.perf_counter()
+    if hasattr(manifest_path, 'read'):
+      reader = CountingReader(manifest_path)
+      manifest = stream_manifest(reader, _projected_selector(paths, tags, names))
+    else:
       with open(manifest_path, 'rb') as file:
-        manifest = json.loads(file.read())
+        reader = CountingReader(file)
+        manifest = stream_manifest(reader, _projected_selector(paths, tags, names))
+    parsed_at = time.perf_counter()
+
+    nodes = manifest['nodes']
+    model_ids = set(key for key, node in nodes.items() if node['resource_type'] == 'model')
+    manifest['nodes'] = {
+      key: node for key, node in nodes.items()
+      if key in model_ids or
+      any(dep in model_ids for dep in node.get('depends_on', {}).get('nodes', []))
+    }
+
+    data = jsonio.dumps(manifest)
+    if isinstance(output_path, io.TextIOBase):
+      output_path.write(data.decode('utf-8'))
+    elif hasattr(output_path, 'write'):
+      output_path.write(data)
     else:
-      with open(manifest_path, 'r', encoding='utf-8') as file:
-        manifest = json.load(file)
-    return Dbt(manifest)
+      with open(output_path, 'wb') as file:
+        file.write(data)
+    finished_at = time.perf_counter()
+
+    return {
+      'input_bytes': reader.bytes_read,
+      'output_bytes': len(data),
+      'models': len(model_ids),
+      'tests': len(manifest['nodes']) - len(model_ids),
+      'parse_seconds': parsed_at - started_at,
+      'total_seconds': finished_at - started_at,
+    }
 
   @staticmethod
-  def from_url(manifest_url: str) -> 'Dbt':
-    with urlopen(manifest_url) as file:
-      data = file.read()
-      if _USE_ORJSON:
-        manifest = json.loads(data)
+  def from_url(manifest_url: str, stream: bool=False, cache_dir: str=None, timeout: float=60.0, retries: int=3, backoff: float=0.5, lean: bool=False, catalog=None, catalog_columns: bool=False) -> 'Dbt':
+    """
+    Loads a manifest from a URL.
+
+    Requests a gzip or deflate transfer and inflates it while reading.
+    Network errors and transient HTTP errors are retried up to `retries`
+    times, waiting `backoff * 2 ** attempt` seconds in between.
+
+    `lean`, `catalog`, and `catalog_columns` work as in `from_file`.
+    A catalog URL is fetched with the same `timeout`, `retries`, and
+    `backoff`.
+
+    With `cache_dir`, the projected manifest and its test index are
+    stored in that directory along with the response's `ETag` and
+    `Last-Modified` headers. Later loads send a conditional request and
+    reuse the stored snapshot if the server replies 304 Not Modified.
+    """
+    if catalog is not None:
+      return Dbt._with_catalog(
+        lambda: Dbt.from_url(manifest_url, stream, cache_dir, timeout, retries, backoff, lean),
+        catalog,
+        catalog_columns,
+        timeout,
+        retries,
+        backoff
+      )
+    # urllib and http.client are only imported when a URL is loaded
+    from cube_dbt.cache import ManifestCache
+    from cube_dbt.fetch import fetch
+
+    with stats.stage('from_url') as stage:
+      def counted(parse):
+        def parse_counted(file):
+          reader = CountingReader(file)
+          try:
+            return parse(reader)
+          finally:
+            stage.count('bytes_read', reader.bytes_read)
+        return parse_counted
+
+      if cache_dir is None:
+        if lean:
+          parse = lambda file: Dbt._snapshot(Dbt._read_projected(file, stream))
+        elif stream:
+          parse = lambda file: stream_manifest(file, _node_selector([], [], []))
+        else:
+          parse = lambda file: jsonio.loads(file.read())
+        result, _ = fetch(manifest_url, counted(parse), timeout=timeout, retries=retries, backoff=backoff)
+        if lean:
+          stage.count('nodes', len(result['manifest']['nodes']))
+          return Dbt._from_snapshot(result)
+        stage.count('nodes', len(result['nodes']))
+        return Dbt(result)
+
+      cache = ManifestCache(cache_dir)
+      parse = counted(lambda file: Dbt._snapshot(Dbt._read_projected(file, stream)))
+      # Only the validators are read before the request
+      cached = cache.load_url(manifest_url)
+      try:
+        result = fetch(
+          manifest_url,
+          parse,
+          etag=cached.header['etag'] if cached else None,
+          last_modified=cached.header['last_modified'] if cached else None,
+          timeout=timeout,
+          retries=retries,
+          backoff=backoff
+        )
+        if result is None:
+          snapshot = cached.read()
+          if snapshot is None:
+            # The stored body is unreadable, fetch the manifest again
+            result = fetch(manifest_url, parse, timeout=timeout, retries=retries, backoff=backoff)
+      finally:
+        if cached is not None:
+          cached.close()
+      if result is not None:
+        stage.count('manifest_cache_misses')
+        snapshot, headers = result
+        cache.save_url(manifest_url, headers, snapshot['manifest'], snapshot['test_index'])
       else:
-        manifest = json.loads(data.decode('utf-8'))
-    return Dbt(manifest)
+        stage.count('manifest_cache_hits')
+      stage.count('nodes', len(snapshot['manifest']['nodes']))
+    return Dbt._from_snapshot(snapshot)
     
-  def filter(self, paths: list[str]=[], tags: list[str]=[], names: list[str]=[]) -> 'Dbt':
-    self.paths = paths
-    self.tags = tags
-    self.names = names
-    return self
+  @staticmethod
+  def _build_indexes(dbt: 'Dbt') -> 'Dbt':
+    dbt._index.build_test_index()
+    dbt._init_selection()
+    return dbt
 
-  def _build_test_index(self):
+  @staticmethod
+  async def from_file_async(manifest_path, stream: bool=False, paths: list[str]=[], tags: list[str]=[], names: list[str]=[], cache_dir: str=None, lean: bool=False, mmap: bool=False, catalog=None, catalog_columns: bool=False, timeout: float=None, executor=None) -> 'Dbt':
     """
-    Build an index of tests by model and column for efficient lookup.
-    Returns a dict like:
-    {
-      'model_name': {
-        'column_name': ['unique', 'not_null', ...]
-      }
-    }
+    Like `from_file`, without blocking the event loop: the manifest is
+    read and parsed, and its indexes built, in `executor` (the loop's
+    default one if `None`). Raises `asyncio.TimeoutError` after `timeout`
+    seconds. Concurrent awaits for the same path and options share one
+    load and get the same object.
     """
-    if self._test_index is not None:
-      return
+    from cube_dbt.loads import LOADS
+    load = lambda: Dbt.from_file(manifest_path, stream, paths, tags, names, cache_dir, lean, mmap, catalog, catalog_columns)
+    key = None
+    if isinstance(manifest_path, (str, os.PathLike)) and not hasattr(catalog, 'read'):
+      key = ('file', os.fspath(manifest_path), stream, tuple(paths), tuple(tags), tuple(names), cache_dir, lean, mmap, catalog, catalog_columns)
+    return await LOADS.run(key, [load, Dbt._build_indexes], timeout, executor)
 
-    self._test_index = {}
+  @staticmethod
+  async def from_url_async(manifest_url: str, stream: bool=False, cache_dir: str=None, retries: int=3, backoff: float=0.5, lean: bool=False, catalog=None, catalog_columns: bool=False, timeout: float=None, executor=None) -> 'Dbt':
+    """
+    Like `from_url`, without blocking the event loop: the download,
+    parsing, and index building run in `executor` (the loop's default
+    one if `None`). `timeout` bounds the whole load, and each network
+    operation too. Concurrent awaits for the same URL and options share
+    one load and get the same object.
+    """
+    from cube_dbt.loads import LOADS
+    load = lambda: Dbt.from_url(
+      manifest_url,
+      stream=stream,
+      cache_dir=cache_dir,
+      timeout=60.0 if timeout is None else timeout,
+      retries=retries,
+      backoff=backoff,
+      lean=lean,
+      catalog=catalog,
+      catalog_columns=catalog_columns
+    )
+    key = None
+    if not hasattr(catalog, 'read'):
+      key = ('url', manifest_url, stream, cache_dir, retries, backoff, lean, catalog, catalog_columns)
+    return await LOADS.run(key, [load, Dbt._build_indexes], timeout, executor)
 
-    for key, node in self.manifest.get('nodes', {}).items():
-      if node.get('resource_type') != 'test':
-        continue
+  @staticmethod
+  def shared(source, ttl: float=None, paths: list[str]=[], tags: list[str]=[], names: list[str]=[], stream: bool=False, cache_dir: str=None, lean: bool=False, catalog=None, catalog_columns: bool=False) -> 'Dbt':
+    """
+    Returns a process-wide `Dbt` object for a manifest path or URL, so
+    templates that load the manifest on every schema compile share one
+    download, parse, and set of indexes.
+
+    The first call loads the manifest, with its indexes, and concurrent
+    callers wait for it. With `ttl`, calls made when the object is older
+    than `ttl` seconds still return it right away, while a background
+    thread loads the manifest again and then swaps the new object in.
+    `paths`, `tags`, and `names` return a view of the shared object.
+    """
+    from cube_dbt.registry import REGISTRY
+    def load() -> 'Dbt':
+      if isinstance(source, str) and source.startswith(('http://', 'https://')):
+        dbt = Dbt.from_url(source, stream=stream, cache_dir=cache_dir, lean=lean, catalog=catalog, catalog_columns=catalog_columns)
+      else:
+        dbt = Dbt.from_file(source, stream=stream, cache_dir=cache_dir, lean=lean, catalog=catalog, catalog_columns=catalog_columns)
+      return Dbt._build_indexes(dbt)
+    dbt = REGISTRY.get((source, stream, cache_dir, lean, catalog, catalog_columns), load, ttl)
+    if paths or tags or names:
+      return dbt.filter(paths, tags, names)
+    return dbt
+
+  @staticmethod
+  def watch(manifest_path: str, callback=None, interval: float=1.0, stream: bool=False, lean: bool=False, mmap: bool=False, catalog=None, catalog_columns: bool=False):
+    """
+    Loads a manifest file and reloads it on a background thread whenever
+    it's rewritten, polling its mtime and size every `interval` seconds.
+    Unchanged models keep their `Model` objects across reloads.
+
+    Returns the started `ManifestWatcher`: its `dbt` attribute is the
+    latest `Dbt` object, and `callback(dbt, diff)`, like any callback
+    registered with `on_change`, is called after each reload.
+    """
+    from cube_dbt.watch import ManifestWatcher
+    watcher = ManifestWatcher(manifest_path, interval, stream, lean, mmap, catalog, catalog_columns)
+    if callback is not None:
+      watcher.on_change(callback)
+    return watcher.start()
+
+  @staticmethod
+  def from_manifests(sources: list, stream: bool=False, paths: list[str]=[], tags: list[str]=[], names: list[str]=[], cache_dir: str=None, lean: bool=False, collisions: str='first', max_workers: int=None) -> 'Dbt':
+    """
+    Loads the manifests of several dbt projects (dbt Mesh), given as
+    paths or URLs, concurrently on a thread pool into one `Dbt` object.
+    `stream`, `cache_dir`, and `lean` apply to every source.
+
+    Models are indexed by unique_id, which includes the project. A model
+    found in several manifests, like an upstream model referenced by a
+    downstream project, is taken from the project that owns it.
+
+    `model('project.name')` always finds one project's model. A bare
+    name defined by several projects resolves to the model of the first
+    source, which is also the only one `render_cubes()` renders, since
+    cube names must be unique. With `collisions='error'`, such names
+    raise a ValueError here instead.
+    """
+    if collisions not in ('first', 'error'):
+      raise ValueError(f"Unknown collisions mode: {collisions}")
+    if not sources:
+      raise ValueError('No manifests to load')
+
+    def load(source) -> tuple:
+      if isinstance(source, str) and source.startswith(('http://', 'https://')):
+        dbt = Dbt.from_url(source, stream=stream, cache_dir=cache_dir, lean=lean)
+      else:
+        dbt = Dbt.from_file(source, stream=stream, cache_dir=cache_dir, lean=lean)
+      dbt._index.build_test_index()
+      return dbt.manifest, dbt._index.test_index
 
-      test_metadata = node.get('test_metadata')
-      if not test_metadata:
-        continue
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max_workers or len(sources)) as executor:
+      manifest, test_index = merge_manifests(list(executor.map(load, sources)))
 
-      test_name = test_metadata.get('name')
-      kwargs = test_metadata.get('kwargs', {})
-      column_name = kwargs.get('column_name')
+    if collisions == 'error':
+      colliding = name_collisions(manifest['nodes'])
+      if colliding:
+        details = '; '.join(f"{name}: {', '.join(unique_ids)}" for name, unique_ids in colliding.items())
+        raise ValueError(f"Model names defined by several projects: {details}")
+    index = ManifestIndex(manifest)
+    index.test_index = test_index
+    return Dbt(manifest, index).filter(paths, tags, names)
 
-      if not test_name or not column_name:
-        continue
+  def share(self, name: str=None):
+    """
+    Publishes the projected models and test index of this manifest (all
+    models, whatever the filters, with catalog types) in a shared memory
+    segment, for other processes on the host to load with
+    `Dbt.attach(shared.name)`. Returns the `SharedManifest`; keep it
+    open while processes attach and `unlink()` it after.
+    """
+    from cube_dbt.shared import SharedManifest
+    self._index.build_test_index()
+    nodes = self._index.nodes
+    test_index = self._index.test_index
+    manifest = {'nodes': {unique_id: project_model(node) for unique_id, node in nodes.items()}}
+    if 'metadata' in self.manifest:
+      manifest['metadata'] = self.manifest['metadata']
+    return SharedManifest.publish({
+      'manifest': manifest,
+      'test_index': {unique_id: test_index[unique_id] for unique_id in nodes if unique_id in test_index},
+    }, name)
 
-      # Get the model this test depends on
-      depends_on = node.get('depends_on', {}).get('nodes', [])
-      for dep in depends_on:
-        if dep.startswith('model.'):
-          # Extract model name from unique_id like "model.project.model_name"
-          model_name = dep.split('.')[-1]
+  @staticmethod
+  def attach(name: str, paths: list[str]=[], tags: list[str]=[], names: list[str]=[]) -> 'Dbt':
+    """
+    Loads a manifest published by `share` in another process, without
+    fetching it or parsing the full manifest: the snapshot is copied out
+    of the segment and deserialized, like a snapshot cache hit, and the
+    indexes are built again in this process. Like lean loads, `manifest`
+    only holds the projected models. Forked workers can skip this with
+    `prefork`.
+    """
+    from cube_dbt.shared import SharedManifest
+    with stats.stage('attach') as stage:
+      snapshot = SharedManifest.load(name)
+      stage.count('nodes', len(snapshot['manifest']['nodes']))
+    return Dbt._from_snapshot(snapshot).filter(paths, tags, names)
 
-          if model_name not in self._test_index:
-            self._test_index[model_name] = {}
+  def prefork(self) -> 'Dbt':
+    """
+    Prepares this object to be inherited by forked worker processes:
+    builds the indexes, every `Model` and `Column`, and the type lookups,
+    then moves all objects to the garbage collector's permanent
+    generation (`gc.freeze`), so collections in the workers don't write
+    to, and copy, the pages they share with the parent. Call it last
+    before forking.
+    """
+    index = self._index
+    index.build_test_index()
+    type_resolver = index.type_resolver
+    for unique_id in index.nodes:
+      for column in index.model(unique_id).columns:
+        data_type = column._column_dict.get('data_type')
+        if data_type is not None:
+          type_resolver.resolve(data_type)
+    self._init_models()
+    import gc
+    gc.collect()
+    gc.freeze()
+    return self
 
-          if column_name not in self._test_index[model_name]:
-            self._test_index[model_name][column_name] = []
+  def filter(self, paths: list[str]=[], tags: list[str]=[], names: list[str]=[]) -> 'Dbt':
+    """
+    Returns a view of the same manifest with the given filters. Views
+    share the parsed manifest, its indexes, and the built `Model` objects,
+    so selecting models for many tenants costs a single parse.
+    """
+    view = Dbt(self.manifest, self._index)
+    view.paths = paths
+    view.tags = tags
+    view.names = names
+    return view
 
-          self._test_index[model_name][column_name].append(test_name)
+  def use_render_cache(self, directory: str, max_bytes: int=DEFAULT_MAX_BYTES) -> 'Dbt':
+    """
+    Stores fragments rendered by `as_cube()` and `as_dimensions()` in a
+    size-bounded on-disk cache shared by this object, its views, and any
+    process using the same directory.
+    """
+    self._index.set_render_cache(RenderCache(directory, max_bytes))
+    return self
+
+  def _init_selection(self):
+    if self._selection is None:
+      self._selection = self._index.select(self.paths, self.tags, self.names)
 
   def _init_models(self):
     if self._models == None:
-      # Build test index first
-      self._build_test_index()
-
-      self._models = list(
-        Model(node, self._test_index.get(node['name'], {})) for key, node in self.manifest['nodes'].items()
-        if node['resource_type'] == 'model' and
-        node['config']['materialized'] != 'ephemeral' and
-        (any(node['path'].startswith(path) for path in self.paths) if self.paths else True) and
-        all(tag in node['config']['tags'] for tag in self.tags) and
-        (node['name'] in self.names if self.names else True)
-      )
-  
+      with stats.stage('init_models') as stage:
+        self._models = list(self.iter_models())
+        stage.count('models', len(self._models))
+
+  def iter_models(self):
+    """
+    Iterates over the selected models in manifest order,
+    building each `Model` only when it's reached.
+    """
+    self._init_selection()
+    for unique_id in self._selection.unique_ids:
+      yield self._index.model(unique_id)
+
   @property
   def models(self) -> list[Model]:
     self._init_models()
     return self._models
-  
-  def model(self, name: str) -> Model:
-    self._init_models()
-    return next(model for model in self._models if model.name == name)
+
+  def model(self, name: str, version=None) -> Model:
+    """
+    Returns a model by name, optionally qualified with its project
+    (`project.name`). For versioned models (dbt 1.5+), returns the
+    `latest_version` unless a specific `version` is requested.
+    """
+    self._init_selection()
+    if version is None:
+      unique_id = self._selection.ids_by_name.get(name)
+    else:
+      unique_id = self._selection.versions.get(name, {}).get(str(version))
+    if unique_id is None:
+      raise StopIteration(f"Model {name} not found")
+    return self._index.model(unique_id)
+
+  def model_by_unique_id(self, unique_id: str) -> Model:
+    self._init_selection()
+    if unique_id not in self._selection:
+      raise StopIteration(f"Model {unique_id} not found")
+    return self._index.model(unique_id)
+
+  def _as_cubes(self, skip: dict={}) -> list:
+    self._init_selection()
+    return list(
+      model._as_cube_with_dimensions(skip.get(model.name, []))
+      for model in map(self._index.model, self._selection.cube_ids)
+    )
+
+  def render_cubes(self, skip: dict={}, processes: int=None) -> str:
+    """
+    Renders a complete `cubes:` document for all selected models in one
+    pass. `skip` maps model names to the columns to leave out. Cube
+    names must be unique, so a versioned model only renders the version
+    `model(name)` returns.
+
+    With `processes` > 1, models are split across a process pool. Workers
+    receive projected nodes rather than the whole manifest, and the
+    output is the same as the serial one, in manifest order.
+    For use in Jinja:
+    {{ dbt.render_cubes(skip={'orders': ['id']}) }}
+    """
+    with stats.stage('render_cubes') as stage:
+      rendered = self._render_cubes(skip, processes)
+      stage.count('bytes_rendered', len(rendered))
+    return rendered
+
+  def _render_cubes(self, skip: dict, processes: int) -> str:
+    if not processes or processes <= 1:
+      return dump({'cubes': self._as_cubes(skip)})
+
+    self._init_selection()
+    unique_ids = self._selection.cube_ids
+    if not unique_ids:
+      return dump({'cubes': []})
+
+    self._index.build_test_index()
+    type_resolver = self._index.type_resolver
+    type_resolver._init_mappings()
+    nodes = self._index.nodes
+    test_index = self._index.test_index
+    models = list(
+      (project_node(nodes[unique_id]), test_index.get(unique_id, {}), skip.get(nodes[unique_id]['name'], []))
+      for unique_id in unique_ids
+    )
+    chunk_size = max(1, -(-len(models) // (processes * _CHUNKS_PER_PROCESS)))
+    chunks = list(
+      (models[start:start + chunk_size], type_resolver)
+      for start in range(0, len(models), chunk_size)
+    )
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+      return SafeString('cubes:\n' + ''.join(executor.map(_render_chunk, chunks)))
+
+  def state(self) -> dict:
+    """
+    Returns a fingerprint of each selected model, by unique_id,
+    to diff against a later manifest.
+    """
+    self._init_selection()
+    return {
+      unique_id: self._index.fingerprint(unique_id)
+      for unique_id in self._selection.unique_ids
+    }
+
+  def save_state(self, path: str) -> None:
+    save_state(self.state(), path)
+
+  def diff(self, previous) -> ManifestDiff:
+    """
+    Compares the selected models with a previous manifest, given as a
+    `Dbt` object, a state from `state()`, or a file from `save_state()`.
+    """
+    if isinstance(previous, Dbt):
+      previous = previous.state()
+    elif isinstance(previous, str):
+      previous = load_state(previous)
+    return ManifestDiff(previous, self.state())
+
+  def render_changed(self, previous, skip: dict={}) -> tuple:
+    """
+    Renders only the models added or changed since `previous` (see `diff`).
+    Returns the diff and a `cubes:` document for each of those models,
+    by unique_id, so callers can rewrite just those and delete the removed ones.
+    Like in `render_cubes`, only one version of a versioned model is rendered.
+    """
+    diff = self.diff(previous)
+    rendered = {}
+    for unique_id in self._selection.cube_ids:
+      if unique_id in diff.modified:
+        model = self._index.model(unique_id)
+        rendered[unique_id] = dump({'cubes': [model._as_cube_with_dimensions(skip.get(model.name, []))]})
+    return diff, rendered
@@ -0,0 +1,73 @@
+import hashlib
+import json
+
+from cube_dbt.manifest import project_model
+
+# Bump whenever the fingerprint inputs change
+STATE_FORMAT_VERSION = 1
+
+def fingerprint(node: dict, tests: dict) -> str:
+  """
+  Content hash of everything a model's cube is rendered from: the
+  projected node and its test index entries. dbt's own `checksum` only
+  covers the SQL file, so it misses changes to columns and descriptions.
+  """
+  data = json.dumps(
+    [project_model(node), tests],
+    sort_keys=True,
+    ensure_ascii=False,
+    separators=(',', ':'),
+    default=str
+  )
+  return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+
+def save_state(state: dict, path: str) -> None:
+  with open(path, 'w', encoding='utf-8') as file:
+    json.dump({'format': STATE_FORMAT_VERSION, 'models': state}, file)
+
+def load_state(path: str) -> dict:
+  with open(path, 'r', encoding='utf-8') as file:
+    data = json.load(file)
+  if data.get('format') != STATE_FORMAT_VERSION:
+    raise ValueError(f"Unsupported state file format: {data.get('format')}")
+  return data['models']
+
+
+class ManifestDiff:
+  """
+  Models added, removed, or changed between two manifest states,
+  as sets of unique_ids.
+  """
+  def __init__(self, previous: dict, current: dict) -> None:
+    self.added = set(current) - set(previous)
+    self.removed = set(previous) - set(current)
+    self.changed = set(
+      unique_id for unique_id, value in current.items()
+      if unique_id in previous and previous[unique_id] != value
+    )
+    pass
+
+  @staticmethod
+  def from_sets(added: set, removed: set, changed: set) -> 'ManifestDiff':
+    """
+    Builds a diff from unique_ids already compared, e.g. by
+    `ManifestIndex.reuse`.
+    """
+    diff = ManifestDiff({}, {})
+    diff.added = set(added)
+    diff.removed = set(removed)
+    diff.changed = set(changed)
+    return diff
+
+  def __repr__(self) -> str:
+    return f'ManifestDiff(added={sorted(self.added)}, removed={sorted(self.removed)}, changed={sorted(self.changed)})'
+
+  def __bool__(self) -> bool:
+    return bool(self.added or self.removed or self.changed)
+
+  @property
+  def modified(self) -> set:
+    """
+    Models to re-render: added or changed.
+    """
+    return self.added | self.changed
@@ -1,4 +1,7 @@
-import yaml
+import re
+from functools import lru_cache
+
+from cube_dbt import stats
 
 class SafeString(str):
     is_safe: bool
@@ -6,23 +9,271 @@ class SafeString(str):
     def __init__(self, v: str):
         self.is_safe = True
 
-class Dumper(yaml.Dumper):
-  def increase_indent(self, flow=False, indentless=False):
-    return super(Dumper, self).increase_indent(flow, indentless)
+# PyYAML is slow to import, so it's only loaded by the first dump that
+# needs it, see `_dumper` and `_resolve`
+_DUMPER = None
+
+def _dumper():
+  global _DUMPER
+  if _DUMPER is None:
+    import yaml
+
+    class Dumper(yaml.Dumper):
+      def increase_indent(self, flow=False, indentless=False):
+        return super(Dumper, self).increase_indent(flow, indentless)
+
+    _DUMPER = Dumper
+  return _DUMPER
+
+def __getattr__(name: str):
+  if name == 'Dumper':
+    return _dumper()
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def indent_string(string: str, indent: int) -> str:
-  return '\n'.join(
-    (' ' * indent if i > 0 else '') +
-    s for i, s in enumerate(string.split('\n'))
-  )
+  return string.replace('\n', '\n' + ' ' * indent)
 
-def dump(data, indent: int=0) -> str:
+def _yaml_dump(data, indent: int) -> str:
+  import yaml
   dump = yaml.dump(
     data,
-    Dumper=Dumper,
+    Dumper=_dumper(),
     sort_keys=False,
     default_flow_style=False,
     allow_unicode=True,
     indent=0
   )
-  return SafeString(indent_string(dump, indent))
+  return indent_string(dump, indent)
+
+
+# The fast emitter below reproduces PyYAML's output byte for byte for the
+# shapes cube_dbt produces: block mappings and sequences of strings, bools,
+# ints, floats, and None. Anything else (strings with line breaks or
+# special characters, shared containers that would get anchors, tuples,
+# str subclasses, complex keys) raises `_Unsupported` and goes through
+# `yaml.dump` instead.
+
+class _Unsupported(Exception):
+  pass
+
+# See Emitter.best_indent and Emitter.best_width
+_BEST_INDENT = 2
+_BEST_WIDTH = 80
+_STR_TAG = 'tag:yaml.org,2002:str'
+_FLOAT_TAG = 'tag:yaml.org,2002:float'
+# See Emitter.check_simple_key: the prepared `!!str` tag counts towards
+# the 128 character limit of simple keys
+_MAX_SIMPLE_KEY_LENGTH = 128 - len('!!str')
+_RESOLVER = None
+_SCALAR_NODE = None
+# Printable characters without line breaks, see Emitter.analyze_scalar.
+# U+2028 and U+2029 are line breaks in YAML 1.1.
+# Compiling it takes a few milliseconds, so it's compiled on first use.
+_PRINTABLE = None
+_SPACES = re.compile(' +')
+
+def _resolve(text: str) -> str:
+  """
+  Returns the tag PyYAML resolves a plain scalar to.
+  """
+  global _RESOLVER, _SCALAR_NODE
+  if _RESOLVER is None:
+    import yaml
+    _RESOLVER = yaml.resolver.Resolver()
+    _SCALAR_NODE = yaml.ScalarNode
+  return _RESOLVER.resolve(_SCALAR_NODE, text, (True, False))
+
+def _plain_allowed(text: str) -> bool:
+  if text[0] == ' ' or text[-1] == ' ' or text.startswith('---') or text.startswith('...'):
+    return False
+  first = text[0]
+  if first in '#,[]{}&*!|>\'"%@`':
+    return False
+  if first in '?:-' and (len(text) == 1 or text[1] == ' '):
+    return False
+  if ': ' in text or text.endswith(':') or ' #' in text:
+    return False
+  return _resolve(text) == _STR_TAG
+
+@lru_cache(maxsize=65536)
+def _string_style(text: str):
+  """
+  Returns `''` (plain) or `"'"` (single-quoted) for a string the fast
+  emitter supports, or `None` otherwise.
+  """
+  global _PRINTABLE
+  if _PRINTABLE is None:
+    _PRINTABLE = re.compile('[\x20-\x7e\xa0-\u2027\u202a-\ud7ff\ue000-\ufefe\uff00-\ufffd\U00010000-\U0010fffe]*\\Z')
+  if not _PRINTABLE.match(text):
+    return None
+  if text and _plain_allowed(text):
+    return ''
+  return "'"
+
+def _float_scalar(value: float) -> str:
+  if value != value:
+    text = '.nan'
+  elif value == float('inf'):
+    text = '.inf'
+  elif value == -float('inf'):
+    text = '-.inf'
+  else:
+    text = repr(value).lower()
+    if '.' not in text and 'e' in text:
+      text = text.replace('e', '.0e', 1)
+  if _resolve(text) != _FLOAT_TAG:
+    raise _Unsupported()
+  return text
+
+
+class _Writer:
+  def __init__(self, indent: int) -> None:
+    self._out = []
+    self._prefix = '\n' + ' ' * indent
+    self._seen = set()
+    self.column = 0
+    pass
+
+  def result(self) -> str:
+    self._out.append(self._prefix)
+    return ''.join(self._out)
+
+  def _newline(self, indent: int) -> None:
+    self._out.append(self._prefix + ' ' * indent)
+    self.column = indent
+
+  def _write(self, data: str) -> None:
+    self._out.append(data)
+    self.column += len(data)
+
+  def _enter(self, value) -> None:
+    # Containers seen twice would be written as anchors and aliases
+    if id(value) in self._seen:
+      raise _Unsupported()
+    self._seen.add(id(value))
+
+  def _scalar(self, value, indent: int, simple_key: bool) -> None:
+    """
+    Writes a scalar, like Emitter.process_scalar. Values follow an
+    indicator and get a separating space, simple keys start a line.
+    `indent` is the indentation of wrapped lines.
+    """
+    space = '' if simple_key else ' '
+    value_type = type(value)
+    if value_type is str:
+      style = _string_style(value)
+      if style is None or (simple_key and (not value or len(value) >= _MAX_SIMPLE_KEY_LENGTH)):
+        raise _Unsupported()
+      if style == '':
+        self._write(space)
+        self._plain(value, indent, not simple_key)
+      else:
+        self._write(space + "'")
+        self._single_quoted(value, indent, not simple_key)
+        self._write("'")
+      return
+    if value is None:
+      text = 'null'
+    elif value_type is bool:
+      text = 'true' if value else 'false'
+    elif value_type is int:
+      text = str(value)
+    elif value_type is float:
+      text = _float_scalar(value)
+    else:
+      raise _Unsupported()
+    self._write(space + text)
+
+  def _plain(self, text: str, indent: int, split: bool) -> None:
+    # See Emitter.write_plain: a single space past the width becomes a line break
+    start = 0
+    for match in _SPACES.finditer(text):
+      self._write(text[start:match.start()])
+      if split and match.end() - match.start() == 1 and self.column > _BEST_WIDTH:
+        self._newline(indent)
+      else:
+        self._write(match.group())
+      start = match.end()
+    self._write(text[start:])
+
+  def _single_quoted(self, text: str, indent: int, split: bool) -> None:
+    # See Emitter.write_single_quoted: spaces at either end never break
+    start = 0
+    for match in _SPACES.finditer(text):
+      self._write(text[start:match.start()].replace("'", "''"))
+      if (
+        split and match.end() - match.start() == 1 and self.column > _BEST_WIDTH and
+        match.start() != 0 and match.end() != len(text)
+      ):
+        self._newline(indent)
+      else:
+        self._write(match.group())
+      start = match.end()
+    self._write(text[start:].replace("'", "''"))
+
+  def node(self, value, indent: int, in_mapping: bool) -> None:
+    """
+    Writes a value after `key:` or `-`, like Emitter.expect_node.
+    `indent` is the indentation of the enclosing collection.
+    """
+    value_type = type(value)
+    if value_type is dict:
+      self._enter(value)
+      if not value:
+        self._write(' {}')
+      else:
+        self.mapping(value, indent + _BEST_INDENT, inline=not in_mapping)
+    elif value_type is list:
+      self._enter(value)
+      if not value:
+        self._write(' []')
+      elif in_mapping:
+        # Sequences in mappings are indentless
+        self.sequence(value, indent, inline=False)
+      else:
+        self.sequence(value, indent + _BEST_INDENT, inline=True)
+    else:
+      self._scalar(value, indent + _BEST_INDENT, simple_key=False)
+
+  def mapping(self, value: dict, indent: int, inline: bool) -> None:
+    for index, (key, item) in enumerate(value.items()):
+      if index == 0 and inline:
+        self._write(' ' * (indent - self.column))
+      elif index > 0 or self.column > 0:
+        self._newline(indent)
+      self._scalar(key, indent, simple_key=True)
+      self._write(':')
+      self.node(item, indent, in_mapping=True)
+
+  def sequence(self, value: list, indent: int, inline: bool) -> None:
+    for index, item in enumerate(value):
+      if index == 0 and inline:
+        self._write(' ' * (indent - self.column))
+      elif index > 0 or self.column > 0:
+        self._newline(indent)
+      self._write('-')
+      self.node(item, indent, in_mapping=False)
+
+
+def _fast_dump(data, indent: int) -> str:
+  writer = _Writer(indent)
+  data_type = type(data)
+  if data_type is dict and data:
+    writer._enter(data)
+    writer.mapping(data, 0, inline=False)
+  elif data_type is list and data:
+    writer._enter(data)
+    writer.sequence(data, 0, inline=False)
+  else:
+    raise _Unsupported()
+  return writer.result()
+
+def dump(data, indent: int=0) -> str:
+  with stats.stage('dump') as stage:
+    try:
+      dumped = _fast_dump(data, indent)
+      stage.count('fast_dump_hits')
+    except _Unsupported:
+      dumped = _yaml_dump(data, indent)
+      stage.count('fast_dump_misses')
+  return SafeString(dumped)
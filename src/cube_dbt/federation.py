@@ -0,0 +1,63 @@
+def project_of(unique_id: str) -> str:
+  """
+  Returns the project (package) part of a unique_id like "model.project.name".
+  """
+  parts = unique_id.split('.', 2)
+  return parts[1] if len(parts) > 1 else ''
+
+def merge_manifests(manifests: list) -> tuple:
+  """
+  Merges the `(manifest, test_index)` pairs of several dbt projects into
+  one manifest and test index, in order.
+
+  unique_ids include the project, so nodes of different projects never
+  clash. A node found in several manifests, like an upstream model that
+  a downstream project references, is taken from the manifest of the
+  project that owns it, along with its tests, or else from the first
+  manifest it's found in.
+  """
+  if not manifests:
+    raise ValueError('No manifests to merge')
+  adapter_types = set(
+    manifest.get('metadata', {}).get('adapter_type') for manifest, _ in manifests
+  )
+  adapter_types.discard(None)
+  if len(adapter_types) > 1:
+    raise ValueError(f"Manifests use different adapters: {', '.join(sorted(adapter_types))}")
+
+  nodes = {}
+  sources = {}
+  for position, (manifest, _) in enumerate(manifests):
+    project_name = manifest.get('metadata', {}).get('project_name')
+    for unique_id, node in manifest['nodes'].items():
+      if unique_id in sources:
+        owner = manifests[sources[unique_id]][0].get('metadata', {}).get('project_name')
+        if owner == project_of(unique_id) or project_name != project_of(unique_id):
+          continue
+      nodes[unique_id] = node
+      sources[unique_id] = position
+
+  test_index = {}
+  for unique_id, position in sources.items():
+    tests = manifests[position][1].get(unique_id)
+    if tests is not None:
+      test_index[unique_id] = tests
+
+  metadata = dict(manifests[0][0].get('metadata', {}))
+  if adapter_types:
+    metadata['adapter_type'] = adapter_types.pop()
+  return {'metadata': metadata, 'nodes': nodes}, test_index
+
+def name_collisions(nodes: dict) -> dict:
+  """
+  Returns the model names defined by more than one project, with the
+  unique_ids of those models.
+  """
+  unique_ids_by_name = {}
+  for unique_id, node in nodes.items():
+    if node.get('resource_type') == 'model':
+      unique_ids_by_name.setdefault(node['name'], []).append(unique_id)
+  return {
+    name: unique_ids for name, unique_ids in unique_ids_by_name.items()
+    if len(set(project_of(unique_id) for unique_id in unique_ids)) > 1
+  }
@@ -0,0 +1,91 @@
+import socket
+import time
+import zlib
+
+from http.client import HTTPException
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+CHUNK_SIZE = 1 << 20
+# Server-side errors worth retrying, on top of network errors and timeouts
+RETRY_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+
+class DecompressingReader:
+  """
+  File-like wrapper that inflates a gzip or deflate response body as it
+  is read, without buffering the whole compressed payload.
+  """
+  def __init__(self, file) -> None:
+    self._file = file
+    # 32 + MAX_WBITS detects both gzip and zlib headers
+    self._decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS)
+    self._eof = False
+    pass
+
+  def read(self, size: int=-1) -> bytes:
+    if size is None or size < 0:
+      chunks = []
+      while True:
+        chunk = self.read(CHUNK_SIZE)
+        if not chunk:
+          return b''.join(chunks)
+        chunks.append(chunk)
+    while not self._eof:
+      tail = self._decompressor.unconsumed_tail
+      if tail:
+        data = self._decompressor.decompress(tail, size)
+      else:
+        compressed = self._file.read(CHUNK_SIZE)
+        if not compressed:
+          self._eof = True
+          return self._decompressor.flush()
+        data = self._decompressor.decompress(compressed, size)
+      if data:
+        return data
+    return b''
+
+
+def _is_retryable(error: Exception) -> bool:
+  if isinstance(error, HTTPError):
+    return error.code in RETRY_STATUS_CODES
+  return isinstance(error, (URLError, HTTPException, ConnectionError, socket.timeout, zlib.error))
+
+def fetch(url: str, parse, etag: str=None, last_modified: str=None, timeout: float=60.0, retries: int=3, backoff: float=0.5):
+  """
+  Fetches `url` and passes the (decompressed) response body as a
+  file-like object to `parse`.
+
+  Sends `If-None-Match`/`If-Modified-Since` when `etag`/`last_modified`
+  are given and returns `None` if the server replies 304 Not Modified.
+  Otherwise returns `(parse(body), headers)` where `headers` holds the
+  validators to send next time. Network errors, timeouts, and transient
+  HTTP errors are retried up to `retries` times with exponential backoff.
+  """
+  headers = {'Accept-Encoding': 'gzip, deflate'}
+  if etag:
+    headers['If-None-Match'] = etag
+  if last_modified:
+    headers['If-Modified-Since'] = last_modified
+
+  attempt = 0
+  while True:
+    try:
+      with urlopen(Request(url, headers=headers), timeout=timeout) as response:
+        encoding = (response.headers.get('Content-Encoding') or '').lower()
+        body = DecompressingReader(response) if encoding in ('gzip', 'x-gzip', 'deflate') else response
+        result = parse(body)
+        return result, {
+          'etag': response.headers.get('ETag'),
+          'last_modified': response.headers.get('Last-Modified'),
+        }
+    except HTTPError as error:
+      if error.code == 304:
+        return None
+      if attempt >= retries or not _is_retryable(error):
+        raise
+    except Exception as error:
+      if attempt >= retries or not _is_retryable(error):
+        raise
+    time.sleep(backoff * 2 ** attempt)
+    attempt += 1
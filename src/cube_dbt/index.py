@@ -0,0 +1,346 @@
+import sys
+
+from bisect import bisect_left
+
+from cube_dbt import stats
+from cube_dbt.catalog import apply_catalog
+from cube_dbt.column import TypeResolver
+from cube_dbt.diff import ManifestDiff, fingerprint
+from cube_dbt.federation import project_of
+from cube_dbt.manifest import MODEL_KEYS, intern_node
+from cube_dbt.model import Model
+
+def is_selected(node: dict, paths: list[str], tags: list[str], names: list[str]) -> bool:
+  """
+  Checks if a model node is materialized and matches the path, tag,
+  and name filters.
+  """
+  return (
+    node['config']['materialized'] != 'ephemeral' and
+    (any(node['path'].startswith(path) for path in paths) if paths else True) and
+    all(tag in node['config']['tags'] for tag in tags) and
+    (node['name'] in names if names else True)
+  )
+
+def _version_key(version) -> tuple:
+  # Numeric versions sort numerically and before any non-numeric ones
+  try:
+    return (0, float(version), '')
+  except (TypeError, ValueError):
+    return (1, 0, str(version))
+
+def _resolve_latest_version(nodes: dict, keys: list[str]) -> str:
+  """
+  Picks the unique_id a bare model name refers to. For versioned models,
+  that's the node whose `version` equals `latest_version`, falling back to
+  the highest version. Unversioned duplicates resolve to the first node.
+  """
+  if len(keys) == 1:
+    return keys[0]
+  versioned = [key for key in keys if nodes[key].get('version') is not None]
+  if not versioned:
+    return keys[0]
+  for key in versioned:
+    node = nodes[key]
+    latest_version = node.get('latest_version')
+    if latest_version is not None and str(node['version']) == str(latest_version):
+      return key
+  return max(versioned, key=lambda key: _version_key(nodes[key]['version']))
+
+
+def _index_test(test_index: dict, node: dict) -> int:
+  """
+  Adds a generic column test to the test index, under the unique_id of
+  the model it's attached to: `attached_node` (dbt 1.5+) or else every
+  model it depends on. Returns the number of entries added.
+  """
+  test_metadata = node.get('test_metadata')
+  if not test_metadata:
+    return 0
+  test_name = test_metadata.get('name')
+  column_name = test_metadata.get('kwargs', {}).get('column_name')
+  if not test_name or not column_name:
+    return 0
+
+  # Test names and column names repeat across many models
+  test_name = sys.intern(test_name)
+  column_name = sys.intern(column_name)
+
+  attached_node = node.get('attached_node')
+  if attached_node:
+    unique_ids = [attached_node] if attached_node.startswith('model.') else []
+  else:
+    unique_ids = [dep for dep in node.get('depends_on', {}).get('nodes', []) if dep.startswith('model.')]
+  for unique_id in unique_ids:
+    test_index.setdefault(unique_id, {}).setdefault(column_name, []).append(test_name)
+  return len(unique_ids)
+
+
+def _same_source(node: dict, previous_node: dict) -> bool:
+  """
+  Cheaply checks if a raw model node has the same SQL checksum and the
+  same values for every key cube_dbt reads as a previous one.
+  """
+  return node.get('checksum') == previous_node.get('checksum') and all(
+    node.get(key) == previous_node.get(key) for key in MODEL_KEYS
+  )
+
+
+class Selection:
+  """
+  The models matching one set of filters, in manifest order,
+  with their name (bare or qualified with the project) and version lookups,
+  and the ones rendered as cubes.
+  """
+  def __init__(self, nodes: dict, unique_ids: list[str]) -> None:
+    self.unique_ids = unique_ids
+    keys_by_name = {}
+    for unique_id in unique_ids:
+      name = nodes[unique_id]['name']
+      keys_by_name.setdefault(name, []).append(unique_id)
+      # Qualified names, like "project.name", tell apart models of different projects
+      keys_by_name.setdefault(f'{project_of(unique_id)}.{name}', []).append(unique_id)
+    self.versions = {
+      name: {str(nodes[key].get('version')): key for key in keys}
+      for name, keys in keys_by_name.items()
+    }
+    self.ids_by_name = {
+      name: _resolve_latest_version(nodes, keys)
+      for name, keys in keys_by_name.items()
+    }
+    # Cube names must be unique, so only the model a bare name resolves
+    # to is a cube: its latest version, from the first project defining it
+    self.cube_ids = [
+      unique_id for unique_id in unique_ids
+      if self.ids_by_name[nodes[unique_id]['name']] == unique_id
+    ]
+    self._unique_id_set = None
+    pass
+
+  def __contains__(self, unique_id: str) -> bool:
+    if self._unique_id_set is None:
+      self._unique_id_set = set(self.unique_ids)
+    return unique_id in self._unique_id_set
+
+
+class ManifestIndex:
+  """
+  Indexes over a parsed manifest, shared by a `Dbt` object and all
+  views returned by `Dbt.filter`: the materialized model nodes, name,
+  tag, and path indexes, the test index, the type resolver for the
+  manifest's adapter, the catalog columns, the built `Model` objects,
+  and the selection for each set of filters.
+  """
+  def __init__(self, manifest: dict) -> None:
+    self.manifest = manifest
+    self.type_resolver = TypeResolver.for_adapter(manifest.get('metadata', {}).get('adapter_type'))
+    self.nodes = None
+    self.test_index = None
+    self._positions = None
+    self._paths = None
+    self._ids_by_tag = None
+    self._ids_by_name = None
+    self.render_cache = None
+    self.catalog = None
+    self.add_catalog_columns = False
+    self.fingerprints = {}
+    self._models = {}
+    self._selections = {}
+    pass
+
+  def _build(self, previous: 'ManifestIndex' = None):
+    """
+    Builds every index in a single pass over the manifest nodes: the
+    materialized models with their name, tag, and path indexes, and the
+    test index, unless it was loaded with a snapshot. Models with catalog
+    columns are replaced with copies completed by the catalog.
+
+    With a `previous` index, models whose source and catalog columns are
+    unchanged (see `_same_source`) take the previous, already interned
+    and completed node instead. Returns their unique_ids, or `None` if
+    the indexes were already built.
+    """
+    if self.nodes is not None:
+      return None
+    same = []
+    if previous is not None and previous.add_catalog_columns != self.add_catalog_columns:
+      previous = None
+    if previous is not None:
+      previous_raw_nodes = previous.manifest['nodes']
+      previous_catalog = previous.catalog or {}
+    with stats.stage('build_index') as stage:
+      nodes = {}
+      ids_by_tag = {}
+      ids_by_name = {}
+      test_index = {} if self.test_index is None else None
+      catalog = self.catalog or {}
+      tests = 0
+      filled = 0
+      added = 0
+      for key, node in self.manifest['nodes'].items():
+        resource_type = node.get('resource_type')
+        if resource_type == 'model':
+          if node['config']['materialized'] == 'ephemeral':
+            continue
+          previous_node = previous.nodes.get(key) if previous is not None else None
+          if (
+            previous_node is not None and
+            key in previous_raw_nodes and
+            catalog.get(key) == previous_catalog.get(key) and
+            _same_source(node, previous_raw_nodes[key])
+          ):
+            node = previous_node
+            same.append(key)
+          else:
+            intern_node(node)
+          if key in catalog and node is not previous_node:
+            node, filled_columns, added_columns = apply_catalog(node, catalog[key], self.type_resolver, self.add_catalog_columns)
+            filled += filled_columns
+            added += added_columns
+          nodes[key] = node
+          ids_by_name.setdefault(node['name'], []).append(key)
+          for tag in node['config'].get('tags', []):
+            ids_by_tag.setdefault(tag, set()).add(key)
+        elif resource_type == 'test' and test_index is not None:
+          tests += _index_test(test_index, node)
+      self._positions = {key: position for position, key in enumerate(nodes)}
+      self._paths = sorted((node['path'], key) for key, node in nodes.items())
+      self._ids_by_tag = ids_by_tag
+      self._ids_by_name = ids_by_name
+      if test_index is not None:
+        self.test_index = test_index
+      self.nodes = nodes
+      stage.count('models', len(nodes))
+      stage.count('tests', tests)
+      if catalog:
+        stage.count('catalog_columns_filled', filled)
+        stage.count('catalog_columns_added', added)
+    return same
+
+  def fingerprint(self, unique_id: str) -> str:
+    """
+    Returns the (memoized) fingerprint of a model, see `diff.fingerprint`.
+    """
+    value = self.fingerprints.get(unique_id)
+    if value is None:
+      self._build()
+      value = fingerprint(self.nodes[unique_id], self.test_index.get(unique_id, {}))
+      self.fingerprints[unique_id] = value
+    return value
+
+  def build_test_index(self) -> None:
+    """
+    Makes sure the indexes are built, including the test index. It maps
+    model unique_ids to their columns' generic tests:
+    {
+      'model.project.model_name': {
+        'column_name': ['unique', 'not_null', ...]
+      }
+    }
+    """
+    self._build()
+
+  def _ids_by_path(self, path: str):
+    # `_paths` is sorted, so the paths starting with a prefix are contiguous
+    position = bisect_left(self._paths, (path,))
+    while position < len(self._paths) and self._paths[position][0].startswith(path):
+      yield self._paths[position][1]
+      position += 1
+
+  def select(self, paths: list[str], tags: list[str], names: list[str]) -> Selection:
+    """
+    Returns the (cached) selection for a set of filters, computed by
+    intersecting the name, tag, and path indexes.
+    """
+    cache_key = (tuple(paths), tuple(tags), tuple(names))
+    selection = self._selections.get(cache_key)
+    if selection is not None:
+      return selection
+
+    self._build()
+    candidates = None
+    if names:
+      candidates = set(key for name in names for key in self._ids_by_name.get(name, []))
+    for tag in sorted(tags, key=lambda tag: len(self._ids_by_tag.get(tag, ()))):
+      tagged = self._ids_by_tag.get(tag, set())
+      candidates = set(tagged) if candidates is None else candidates & tagged
+      if not candidates:
+        break
+
+    if paths and (candidates is None or candidates):
+      matching = set(key for path in paths for key in self._ids_by_path(path))
+      candidates = matching if candidates is None else candidates & matching
+
+    if candidates is None:
+      unique_ids = list(self.nodes)
+    else:
+      unique_ids = sorted(candidates, key=self._positions.__getitem__)
+
+    selection = Selection(self.nodes, unique_ids)
+    self._selections[cache_key] = selection
+    return selection
+
+  def set_catalog(self, catalog: dict, add_columns: bool=False) -> None:
+    """
+    Sets the catalog columns (see `catalog_index`) that complete the
+    models' column types and, with `add_columns`, their columns.
+    Models are rebuilt on next use.
+    """
+    self.catalog = catalog
+    self.add_catalog_columns = add_columns
+    self.nodes = None
+    self.fingerprints = {}
+    self._models = {}
+    self._selections = {}
+
+  def reuse(self, previous: 'ManifestIndex') -> ManifestDiff:
+    """
+    Builds this index from a previous one, e.g. of an earlier version of
+    the same manifest: models with the same source, catalog columns, and
+    tests keep the previous node, fingerprint, and built `Model` object,
+    and so are neither interned, completed, nor built again. Other models
+    are compared by fingerprint, so changes to keys cube_dbt doesn't read
+    don't count. Returns what changed since `previous`.
+    """
+    previous._build()
+    same = self._build(previous)
+    same = set(same) if same is not None else set()
+    changed = set()
+    with stats.stage('reuse_index') as stage:
+      for unique_id in self.nodes:
+        previous_node = previous.nodes.get(unique_id)
+        if previous_node is None:
+          continue
+        if unique_id in same:
+          unchanged = self.test_index.get(unique_id) == previous.test_index.get(unique_id)
+        else:
+          unchanged = self.fingerprint(unique_id) == previous.fingerprint(unique_id)
+        if not unchanged:
+          changed.add(unique_id)
+          continue
+        self.nodes[unique_id] = previous_node
+        if unique_id in previous.fingerprints:
+          self.fingerprints[unique_id] = previous.fingerprints[unique_id]
+        model = previous._models.get(unique_id)
+        if model is not None:
+          self._models[unique_id] = model
+          stage.count('models_reused')
+      stage.count('models_changed', len(changed))
+    return ManifestDiff.from_sets(
+      self.nodes.keys() - previous.nodes.keys(),
+      previous.nodes.keys() - self.nodes.keys(),
+      changed
+    )
+
+  def set_render_cache(self, render_cache) -> None:
+    self.render_cache = render_cache
+    for model in self._models.values():
+      model._render_cache = render_cache
+
+  def model(self, unique_id: str) -> Model:
+    model = self._models.get(unique_id)
+    if model is None:
+      self._build()
+      model = Model(self.nodes[unique_id], self.test_index.get(unique_id, {}), self.type_resolver, self.render_cache)
+      self._models[unique_id] = model
+    return model
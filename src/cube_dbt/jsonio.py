@@ -0,0 +1,45 @@
+# orjson imports datetime, uuid, and zoneinfo, so the JSON module is
+# only imported by the first load, see `json_module`
+_JSON = None
+_USE_ORJSON = None
+
+def json_module():
+  """
+  Returns orjson if it's installed, or else the standard json module.
+  """
+  global _JSON, _USE_ORJSON
+  if _JSON is None:
+    try:
+      import orjson as json
+      # orjson.loads() requires bytes, returns dict
+      _USE_ORJSON = True
+    except ImportError:
+      import json
+      _USE_ORJSON = False
+    _JSON = json
+  return _JSON
+
+def use_orjson() -> bool:
+  """
+  Whether `json_module` is orjson, whose loads() takes bytes.
+  """
+  json_module()
+  return _USE_ORJSON
+
+def loads(data):
+  """
+  Parses JSON from bytes or a string.
+  """
+  json = json_module()
+  if _USE_ORJSON or isinstance(data, str):
+    return json.loads(data)
+  return json.loads(data.decode('utf-8'))
+
+def dumps(data) -> bytes:
+  """
+  Serializes to compact UTF-8 JSON.
+  """
+  json = json_module()
+  if _USE_ORJSON:
+    return json.dumps(data)
+  return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
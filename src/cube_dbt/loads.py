@@ -0,0 +1,61 @@
+import asyncio
+
+
+class _InFlight:
+  def __init__(self, task: asyncio.Task) -> None:
+    self.task = task
+    self.waiters = 0
+    pass
+
+
+class InFlightLoads:
+  """
+  Runs blocking loads in an executor for asyncio code, sharing one
+  in-flight load between all concurrent awaits of the same key.
+
+  A load is cancelled once every await of it has been cancelled or has
+  timed out. Python threads can't be interrupted, so a step already
+  running in the executor finishes in the background, but the steps
+  after it don't run and its result is dropped.
+  """
+  def __init__(self) -> None:
+    self._loads = {}
+    pass
+
+  async def _run(self, steps: list, executor):
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(executor, steps[0])
+    for step in steps[1:]:
+      result = await loop.run_in_executor(executor, step, result)
+    return result
+
+  async def run(self, key, steps: list, timeout: float=None, executor=None):
+    """
+    Runs `steps` in `executor`, each getting the result of the previous
+    one, and returns the last result. Awaits with the same `key` on the
+    same event loop share a single run; `None` keys are never shared.
+    """
+    loop = asyncio.get_running_loop()
+    load = self._loads.get((loop, key)) if key is not None else None
+    if load is None:
+      load = _InFlight(loop.create_task(self._run(steps, executor)))
+      if key is not None:
+        self._loads[(loop, key)] = load
+        load.task.add_done_callback(lambda task: self._forget(loop, key, load))
+    load.waiters += 1
+    try:
+      return await asyncio.wait_for(asyncio.shield(load.task), timeout)
+    finally:
+      load.waiters -= 1
+      if load.waiters == 0 and not load.task.done():
+        # Later awaits of the key start a new load instead of joining this one
+        if key is not None:
+          self._forget(loop, key, load)
+        load.task.cancel()
+
+  def _forget(self, loop, key, load: _InFlight) -> None:
+    if self._loads.get((loop, key)) is load:
+      del self._loads[(loop, key)]
+
+# Shared by `Dbt.from_file_async` and `Dbt.from_url_async`
+LOADS = InFlightLoads()
@@ -0,0 +1,266 @@
+import codecs
+import json
+import re
+import sys
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DECODER = json.JSONDecoder()
+# Characters that may continue a number, e.g. a cut `1.` or `1e`
+_NUMBER_CHARS = frozenset('0123456789.eE+-')
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+class CountingReader:
+  """
+  File-like wrapper that counts the bytes (or characters) read through it.
+  """
+  def __init__(self, file) -> None:
+    self._file = file
+    self.bytes_read = 0
+    pass
+
+  def read(self, size: int=-1):
+    data = self._file.read(size)
+    self.bytes_read += len(data)
+    return data
+
+
+class ManifestReader:
+  """
+  Incremental reader over a JSON document.
+
+  Values are decoded one at a time with the C-accelerated
+  `json.JSONDecoder.raw_decode`, so only the value being decoded and
+  a small read-ahead buffer are held in memory. Accepts binary or
+  text file-like objects (e.g. `sys.stdin` or `sys.stdin.buffer`).
+  """
+  def __init__(self, file, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    self._file = file
+    self._chunk_size = chunk_size
+    self._utf8 = codecs.getincrementaldecoder('utf-8')()
+    self._buffer = ''
+    self._pos = 0
+    self._eof = False
+    self.bytes_read = 0
+    pass
+
+  def _fill(self, size: int) -> bool:
+    if self._eof:
+      return False
+    chunk = self._file.read(size)
+    self.bytes_read += len(chunk)
+    if isinstance(chunk, bytes):
+      text = self._utf8.decode(chunk, final=not chunk)
+    else:
+      text = chunk
+    if not chunk:
+      self._eof = True
+    self._buffer = self._buffer[self._pos:] + text
+    self._pos = 0
+    return bool(chunk)
+
+  def peek(self) -> str:
+    """
+    Skip whitespace and return the next significant character
+    without consuming it.
+    """
+    while True:
+      self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+      if self._pos < len(self._buffer):
+        return self._buffer[self._pos]
+      if not self._fill(self._chunk_size):
+        raise ValueError('Unexpected end of manifest')
+
+  def expect(self, char: str) -> None:
+    if self.peek() != char:
+      raise ValueError(f"Expected '{char}' in manifest, got '{self.peek()}'")
+    self._pos += 1
+
+  def value(self):
+    """
+    Decode the next complete JSON value.
+    """
+    self.peek()
+    while True:
+      try:
+        value, end = _DECODER.raw_decode(self._buffer, self._pos)
+      except ValueError:
+        # Most likely the value is cut by the end of the buffer. Grow the
+        # read size geometrically so huge values stay linear overall.
+        if self._fill(max(self._chunk_size, len(self._buffer) - self._pos)):
+          continue
+        raise
+      # A number cut by the end of the buffer decodes as a shorter one,
+      # like `1` for `1.` or `1e`, followed by the rest of the buffer
+      if (
+        type(value) in (int, float) and not self._eof and
+        (end >= len(self._buffer) or self._buffer[end] in _NUMBER_CHARS)
+      ):
+        self._fill(self._chunk_size)
+        continue
+      self._pos = end
+      return value
+
+  def items(self):
+    """
+    Iterate over the keys of the object at the current position.
+    The caller must consume each entry's value, either with `value()`
+    or `skip()`, before advancing.
+    """
+    self.expect('{')
+    if self.peek() == '}':
+      self._pos += 1
+      return
+    while True:
+      key = self.value()
+      self.expect(':')
+      yield key
+      char = self.peek()
+      self._pos += 1
+      if char == '}':
+        return
+      if char != ',':
+        raise ValueError(f"Expected ',' or '}}' in manifest, got '{char}'")
+
+  def skip(self) -> None:
+    """
+    Consume the next value without keeping it. Objects and arrays are
+    walked one entry at a time, so skipping a large section never
+    materializes it.
+    """
+    char = self.peek()
+    if char == '{':
+      for _ in self.items():
+        self.value()
+    elif char == '[':
+      self._pos += 1
+      if self.peek() == ']':
+        self._pos += 1
+        return
+      while True:
+        self.value()
+        char = self.peek()
+        self._pos += 1
+        if char == ']':
+          return
+        if char != ',':
+          raise ValueError(f"Expected ',' or ']' in manifest, got '{char}'")
+    else:
+      self.value()
+
+
+def stream_manifest(file, select=None, sections: tuple = ('metadata',), chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+  """
+  Read a manifest from a file-like object, walking `nodes` once.
+
+  `select(node)` is called for every node as soon as it is decoded and
+  returns the node to keep (possibly projected) or `None` to drop it.
+  Top-level sections other than `nodes` and those listed in `sections`
+  are skipped without being built.
+  """
+  reader = ManifestReader(file, chunk_size)
+  manifest = {'nodes': {}}
+  for key in reader.items():
+    if key == 'nodes':
+      nodes = manifest['nodes']
+      for unique_id in reader.items():
+        node = reader.value()
+        if select is not None:
+          node = select(node)
+        if node is not None:
+          nodes[unique_id] = node
+    elif key in sections:
+      manifest[key] = reader.value()
+    else:
+      reader.skip()
+  return manifest
+
+
+# Keys read by cube_dbt, see "Preprocessing the manifest.json file" in README
+MODEL_KEYS = (
+  'name',
+  'path',
+  'description',
+  'config',
+  'resource_type',
+  'database',
+  'schema',
+  'alias',
+  'relation_name',
+  'columns',
+  'constraints',
+  'version',
+  'latest_version',
+)
+CONFIG_KEYS = ('materialized', 'tags')
+COLUMN_KEYS = ('name', 'description', 'data_type', 'meta', 'tags')
+# Keys of a test node read by `ManifestIndex` to build the test index
+TEST_KEYS = ('resource_type', 'test_metadata', 'depends_on', 'attached_node')
+
+
+def _pick(data: dict, keys: tuple) -> dict:
+  return {key: data[key] for key in keys if key in data}
+
+def project_model(node: dict) -> dict:
+  """
+  Returns a copy of a model node reduced to the keys cube_dbt reads.
+  """
+  projected = _pick(node, MODEL_KEYS)
+  if 'config' in projected:
+    projected['config'] = _pick(projected['config'], CONFIG_KEYS)
+  if 'columns' in projected:
+    projected['columns'] = {
+      key: _pick(column, COLUMN_KEYS)
+      for key, column in projected['columns'].items()
+    }
+  return projected
+
+def project_node(node: dict):
+  """
+  Returns a copy of a model or test node reduced to the keys cube_dbt
+  reads, or `None` for any other node.
+  """
+  resource_type = node.get('resource_type')
+  if resource_type == 'model':
+    return project_model(node)
+  if resource_type == 'test' and node.get('test_metadata'):
+    return _pick(node, TEST_KEYS)
+  return None
+
+_INTERNED_COLUMN_KEYS = ('name', 'data_type')
+
+def intern_node(node: dict) -> None:
+  """
+  Replaces the strings of a model node that repeat across models (column
+  names, data types, and tags) with interned copies, in place, so each
+  distinct value is stored once instead of once per column.
+  """
+  intern = sys.intern
+  config = node.get('config')
+  if config and config.get('tags'):
+    config['tags'] = [intern(tag) for tag in config['tags']]
+  for column in node.get('columns', {}).values():
+    for key in _INTERNED_COLUMN_KEYS:
+      try:
+        column[key] = intern(column[key])
+      except (KeyError, TypeError):
+        pass
+    tags = column.get('tags')
+    if tags:
+      column['tags'] = [intern(tag) for tag in tags]
+
+def project_manifest(manifest: dict) -> dict:
+  """
+  Returns a copy of a parsed manifest reduced to `metadata` and the
+  projected model and test nodes.
+  """
+  nodes = {}
+  for unique_id, node in manifest.get('nodes', {}).items():
+    projected = project_node(node)
+    if projected is not None:
+      nodes[unique_id] = projected
+  projected_manifest = {'nodes': nodes}
+  if 'metadata' in manifest:
+    projected_manifest['metadata'] = manifest['metadata']
+  return projected_manifest
@@ -1,11 +1,30 @@
-from cube_dbt.column import Column
+from cube_dbt import stats
+from cube_dbt.column import Column, TypeResolver
+from cube_dbt.diff import fingerprint
 from cube_dbt.dump import dump, SafeString
+from cube_dbt.render_cache import RenderCache, render_key
 
 class Model:
-  def __init__(self, model_dict: dict, test_index: dict = None) -> None:
+  __slots__ = (
+    '_model_dict',
+    '_test_index',
+    '_type_resolver',
+    '_render_cache',
+    '_fingerprint',
+    '_columns',
+    '_columns_by_name',
+    '_primary_key',
+    '_constraint_primary_keys',
+  )
+
+  def __init__(self, model_dict: dict, test_index: dict = None, type_resolver: TypeResolver = None, render_cache: RenderCache = None) -> None:
     self._model_dict = model_dict
     self._test_index = test_index or {}
+    self._type_resolver = type_resolver
+    self._render_cache = render_cache
+    self._fingerprint = None
     self._columns = None
+    self._columns_by_name = None
     self._primary_key = None
     self._constraint_primary_keys = None
     pass
@@ -16,11 +35,15 @@ class Model:
   def _init_columns(self) -> None:
     if self._columns == None:
       self._columns = list(
-        Column(self.name, column, self._test_index.get(column['name'], []))
+        Column(self.name, column, self._test_index.get(column['name'], ()), self._type_resolver)
         for key, column in self._model_dict['columns'].items()
       )
+      self._columns_by_name = {}
+      for column in self._columns:
+        self._columns_by_name.setdefault(column.name, column)
       self._detect_constraint_primary_keys()
       self._detect_primary_key()
+      stats.count('columns', len(self._columns))
 
   def _detect_constraint_primary_keys(self) -> None:
     """
@@ -83,7 +106,10 @@ class Model:
   
   def column(self, name: str) -> Column:
     self._init_columns()
-    return next(column for column in self._columns if column.name == name)
+    column = self._columns_by_name.get(name)
+    if column is None:
+      raise StopIteration(f"Column {self.name}.{name} not found")
+    return column
   
   @property
   def primary_key(self) -> list[Column]:
@@ -98,12 +124,24 @@ class Model:
     data['sql_table'] = self.sql_table
     return data
 
+  def _render(self, kind: str, params, render) -> str:
+    """
+    Renders a fragment through the render cache, if any.
+    """
+    if self._render_cache is None:
+      return render()
+    if self._fingerprint is None:
+      self._fingerprint = fingerprint(self._model_dict, self._test_index)
+    resolver = self._type_resolver or TypeResolver.for_adapter()
+    key = render_key(kind, params, self._fingerprint, resolver.digest())
+    return SafeString(self._render_cache.render(key, render))
+
   def as_cube(self) -> str:
     """
     For use in Jinja:
     {{ dbt.model('name').as_cube() }}
     """
-    return dump(self._as_cube(), indent=4)
+    return self._render('cube', [], lambda: dump(self._as_cube(), indent=4))
   
   def _as_dimensions(self, skip: list[str]=[]) -> list:
     return list(
@@ -112,10 +150,19 @@ class Model:
       if column.name not in skip
     )
   
+  def _as_cube_with_dimensions(self, skip: list[str]=[]) -> dict:
+    data = self._as_cube()
+    dimensions = self._as_dimensions(skip)
+    if dimensions:
+      data['dimensions'] = dimensions
+    return data
+
   def as_dimensions(self, skip: list[str]=[]) -> str:
     """
     For use in Jinja:
     {{ dbt.model('name').as_dimensions(skip=['id']) }}
     """
-    dimensions = self._as_dimensions(skip)
-    return dump(dimensions, indent=6) if dimensions else SafeString('')
\ No newline at end of file
+    def render():
+      dimensions = self._as_dimensions(skip)
+      return dump(dimensions, indent=6) if dimensions else SafeString('')
+    return self._render('dimensions', list(skip), render)
\ No newline at end of file
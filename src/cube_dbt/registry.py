@@ -0,0 +1,83 @@
+import threading
+import time
+
+
+class _Entry:
+  def __init__(self, value, loaded_at: float) -> None:
+    self.value = value
+    self.loaded_at = loaded_at
+    self.refreshing = False
+    self.error = None
+    pass
+
+
+class Registry:
+  """
+  Process-wide cache of loaded values, by key, with stale-while-revalidate
+  refresh.
+
+  The first `get` of a key loads the value, and concurrent callers wait
+  for that one load. Once the value is older than its `ttl`, `get` keeps
+  returning it while a background thread loads a new one, which then
+  replaces it in one step. A failed refresh keeps the old value, stores
+  the exception in `error(key)`, and is retried after another `ttl`.
+  """
+  def __init__(self) -> None:
+    self._entries = {}
+    self._loading = {}
+    self._lock = threading.Lock()
+    pass
+
+  def get(self, key, load, ttl: float=None):
+    """
+    Returns the value of `key`, calling `load()` if there's none yet and
+    refreshing it in the background if it's older than `ttl` seconds.
+    """
+    entry = self._entries.get(key)
+    if entry is None:
+      return self._load(key, load)
+    if ttl is not None and time.monotonic() - entry.loaded_at >= ttl:
+      with self._lock:
+        refresh = not entry.refreshing and self._entries.get(key) is entry
+        entry.refreshing = True
+      if refresh:
+        threading.Thread(target=self._refresh, args=(key, load, entry), name='cube_dbt-refresh', daemon=True).start()
+    return entry.value
+
+  def _load(self, key, load):
+    with self._lock:
+      loading = self._loading.setdefault(key, threading.Lock())
+    with loading:
+      entry = self._entries.get(key)
+      if entry is None:
+        entry = _Entry(load(), time.monotonic())
+        with self._lock:
+          self._entries[key] = entry
+    return entry.value
+
+  def _refresh(self, key, load, entry: _Entry) -> None:
+    try:
+      value = load()
+    except Exception as error:
+      with self._lock:
+        entry.error = error
+        entry.loaded_at = time.monotonic()
+        entry.refreshing = False
+      return
+    with self._lock:
+      if self._entries.get(key) is entry:
+        self._entries[key] = _Entry(value, time.monotonic())
+
+  def error(self, key):
+    """
+    Returns the exception of the last failed refresh of `key`, if any.
+    """
+    entry = self._entries.get(key)
+    return entry.error if entry is not None else None
+
+  def clear(self) -> None:
+    with self._lock:
+      self._entries = {}
+
+# Shared by `Dbt.shared`
+REGISTRY = Registry()
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+
+from cube_dbt import stats
+
+
+# Bump whenever rendering changes in a way the package version doesn't capture
+RENDER_FORMAT_VERSION = 1
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Eviction frees space down to this share of `max_bytes`
+_LOW_WATERMARK = 0.8
+_PACKAGE_VERSION = None
+
+def _package_version() -> str:
+  # importlib.metadata is slow to import, so it's only loaded once a cache is used
+  global _PACKAGE_VERSION
+  if _PACKAGE_VERSION is None:
+    try:
+      from importlib.metadata import PackageNotFoundError, version
+      try:
+        _PACKAGE_VERSION = version('cube_dbt')
+      except PackageNotFoundError:
+        _PACKAGE_VERSION = 'unknown'
+    except ImportError:
+      _PACKAGE_VERSION = 'unknown'
+  return _PACKAGE_VERSION
+
+def render_key(kind: str, params, model_fingerprint: str, resolver_digest: str) -> str:
+  """
+  Content address of a rendered fragment: what is rendered (`kind` and
+  its `params`), from which model content, with which type mappings,
+  by which cube_dbt version.
+  """
+  data = json.dumps(
+    [RENDER_FORMAT_VERSION, _package_version(), kind, params, model_fingerprint, resolver_digest],
+    separators=(',', ':')
+  )
+  return hashlib.blake2b(data.encode('utf-8'), digest_size=20).hexdigest()
+
+
+class RenderCache:
+  """
+  On-disk cache of rendered YAML fragments, keyed by `render_key`.
+
+  Each fragment is a file, written to a temporary file and atomically
+  renamed into place, so processes can share a directory. Hits refresh
+  the file's mtime; when the directory grows past `max_bytes`, the least
+  recently used fragments are deleted.
+  """
+  def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+    self.directory = directory
+    self.max_bytes = max_bytes
+    self.hits = 0
+    self.misses = 0
+    os.makedirs(directory, exist_ok=True)
+    self._size = self._scan_size()
+    pass
+
+  def _path(self, key: str) -> str:
+    return os.path.join(self.directory, key[:2], key)
+
+  def _entries(self) -> list:
+    entries = []
+    for root, _, files in os.walk(self.directory):
+      for name in files:
+        if name.endswith('.tmp'):
+          continue
+        path = os.path.join(root, name)
+        try:
+          stat = os.stat(path)
+        except FileNotFoundError:
+          continue
+        entries.append((stat.st_mtime_ns, stat.st_size, path))
+    return entries
+
+  def _scan_size(self) -> int:
+    return sum(size for _, size, _ in self._entries())
+
+  def get(self, key: str):
+    path = self._path(key)
+    try:
+      with open(path, 'r', encoding='utf-8') as file:
+        value = file.read()
+    except FileNotFoundError:
+      self.misses += 1
+      stats.count('render_cache_misses')
+      return None
+    try:
+      os.utime(path)
+    except OSError:
+      pass
+    self.hits += 1
+    stats.count('render_cache_hits')
+    return value
+
+  def put(self, key: str, value: str) -> None:
+    path = self._path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = value.encode('utf-8')
+    import tempfile
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'wb') as file:
+        file.write(data)
+      try:
+        # Overwriting a fragment only grows the cache by the difference
+        previous_size = os.path.getsize(path)
+      except FileNotFoundError:
+        previous_size = 0
+      os.replace(temp_path, path)
+    except BaseException:
+      try:
+        os.unlink(temp_path)
+      except OSError:
+        pass
+      raise
+    self._size += len(data) - previous_size
+    if self._size > self.max_bytes:
+      self.evict()
+
+  def evict(self) -> None:
+    """
+    Deletes the least recently used fragments until the cache is below
+    its low watermark. Other processes may evict at the same time, so
+    missing files are skipped.
+    """
+    entries = sorted(self._entries())
+    size = sum(size for _, size, _ in entries)
+    target = self.max_bytes * _LOW_WATERMARK
+    for _, entry_size, path in entries:
+      if size <= target:
+        break
+      try:
+        os.unlink(path)
+      except FileNotFoundError:
+        pass
+      size -= entry_size
+    self._size = size
+
+  def render(self, key: str, render) -> str:
+    """
+    Returns the cached fragment for `key`, or calls `render()` and stores the result.
+    """
+    value = self.get(key)
+    if value is None:
+      value = render()
+      self.put(key, value)
+    return value
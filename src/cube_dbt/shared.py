@@ -0,0 +1,86 @@
+import mmap
+import os
+import struct
+
+from multiprocessing import shared_memory
+
+from cube_dbt.cache import dumps_snapshot, loads_snapshot
+
+# Length of the snapshot, which may be shorter than the segment: some
+# platforms round segment sizes up to whole pages
+_HEADER = struct.Struct('<Q')
+
+
+def _read(name: str) -> bytes:
+  """
+  Copies the snapshot out of the segment `name`.
+  """
+  try:
+    import _posixshmem
+  except ImportError:
+    # Windows doesn't track segments, and frees them with their last handle
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+      (size,) = _HEADER.unpack_from(segment.buf, 0)
+      return bytes(segment.buf[_HEADER.size:_HEADER.size + size])
+    finally:
+      segment.close()
+  # SharedMemory(name) would register the segment with this process's
+  # resource tracker, which unlinks it when the process exits, so map it
+  # directly instead: only the publisher owns it
+  fd = _posixshmem.shm_open('/' + name, os.O_RDONLY, mode=0o600)
+  try:
+    with mmap.mmap(fd, os.fstat(fd).st_size, prot=mmap.PROT_READ) as buf:
+      (size,) = _HEADER.unpack_from(buf, 0)
+      return buf[_HEADER.size:_HEADER.size + size]
+  finally:
+    os.close(fd)
+
+
+class SharedManifest:
+  """
+  A snapshot of a projected manifest and its test index, in the format
+  of the snapshot cache, published in a named shared memory segment.
+
+  One process publishes it and keeps it open; other processes on the
+  same host read it with `load(name)` instead of fetching the manifest
+  and parsing all of it; they still deserialize the snapshot. The publisher `unlink()`s it once
+  no more processes will attach.
+  """
+  def __init__(self, segment: shared_memory.SharedMemory) -> None:
+    self._segment = segment
+    self.name = segment.name
+    pass
+
+  @staticmethod
+  def publish(snapshot: dict, name: str=None) -> 'SharedManifest':
+    data = dumps_snapshot(snapshot)
+    segment = shared_memory.SharedMemory(name=name, create=True, size=_HEADER.size + len(data))
+    _HEADER.pack_into(segment.buf, 0, len(data))
+    segment.buf[_HEADER.size:_HEADER.size + len(data)] = data
+    return SharedManifest(segment)
+
+  @staticmethod
+  def load(name: str) -> dict:
+    """
+    Reads the snapshot published as `name`.
+    Raises a ValueError if it's from another version of cube_dbt.
+    """
+    snapshot = loads_snapshot(_read(name))
+    if snapshot is None:
+      raise ValueError(f"Shared manifest {name} has an unsupported format")
+    return snapshot
+
+  def close(self) -> None:
+    self._segment.close()
+
+  def unlink(self) -> None:
+    self._segment.close()
+    self._segment.unlink()
+
+  def __enter__(self) -> 'SharedManifest':
+    return self
+
+  def __exit__(self, *exc_info) -> bool:
+    self.unlink()
+    return False
@@ -0,0 +1,140 @@
+import time
+
+# The enabled `Stats`, or `None` while instrumentation is off
+current = None
+
+
+class Stats:
+  """
+  Timings and counters collected while instrumentation is enabled.
+
+  `timings` holds the total seconds spent in each stage and `calls` the
+  number of times it ran. Stages can nest (e.g. `dump` runs inside
+  `render_cubes`), so timings are inclusive. Counters ending in `_hits`
+  and `_misses` are summed up by `hit_rate`.
+
+  Each hook is called as `hook(stage, seconds, counters)` when a stage
+  finishes, with the counters recorded during that stage.
+  """
+  def __init__(self, hooks: list=[]) -> None:
+    self.timings = {}
+    self.calls = {}
+    self.counters = {}
+    self.hooks = list(hooks)
+    pass
+
+  def __repr__(self) -> str:
+    return f'Stats({self.as_dict()})'
+
+  def count(self, name: str, value: int=1) -> None:
+    self.counters[name] = self.counters.get(name, 0) + value
+
+  def record(self, stage: str, seconds: float, counters: dict={}) -> None:
+    self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+    self.calls[stage] = self.calls.get(stage, 0) + 1
+    for hook in self.hooks:
+      hook(stage, seconds, counters)
+
+  def hit_rate(self, name: str):
+    """
+    Returns the share of hits for a cache, e.g. `hit_rate('render_cache')`,
+    or `None` if it wasn't used.
+    """
+    hits = self.counters.get(f'{name}_hits', 0)
+    total = hits + self.counters.get(f'{name}_misses', 0)
+    return hits / total if total else None
+
+  def as_dict(self) -> dict:
+    caches = set(
+      name.rsplit('_', 1)[0] for name in self.counters
+      if name.endswith('_hits') or name.endswith('_misses')
+    )
+    return {
+      'timings': dict(self.timings),
+      'calls': dict(self.calls),
+      'counters': dict(self.counters),
+      'hit_rates': {name: self.hit_rate(name) for name in sorted(caches)},
+    }
+
+  def reset(self) -> None:
+    self.timings = {}
+    self.calls = {}
+    self.counters = {}
+
+
+class _Stage:
+  def __init__(self, stats: Stats, name: str) -> None:
+    self._stats = stats
+    self._name = name
+    self._counters = {}
+    self._started_at = None
+    pass
+
+  def __enter__(self) -> '_Stage':
+    self._started_at = time.perf_counter()
+    return self
+
+  def __exit__(self, *exc_info) -> bool:
+    self._stats.record(self._name, time.perf_counter() - self._started_at, self._counters)
+    return False
+
+  def count(self, name: str, value: int=1) -> None:
+    self._counters[name] = self._counters.get(name, 0) + value
+    self._stats.count(name, value)
+
+
+class _NullStage:
+  def __enter__(self) -> '_NullStage':
+    return self
+
+  def __exit__(self, *exc_info) -> bool:
+    return False
+
+  def count(self, name: str, value: int=1) -> None:
+    pass
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name: str):
+  """
+  Context manager timing a stage. While instrumentation is off, it's a
+  shared no-op object, so instrumented code pays a single check.
+  """
+  if current is None:
+    return _NULL_STAGE
+  return _Stage(current, name)
+
+def count(name: str, value: int=1) -> None:
+  if current is not None:
+    current.count(name, value)
+
+def enable(hook=None) -> Stats:
+  """
+  Turns instrumentation on for the whole process and returns the `Stats`
+  that will collect it. `hook`, if given, is called for every finished
+  stage, see `Stats`.
+  """
+  global current
+  current = Stats([hook] if hook is not None else [])
+  return current
+
+def disable():
+  """
+  Turns instrumentation off and returns the collected `Stats`, if any.
+  """
+  global current
+  stats, current = current, None
+  return stats
+
+def logging_hook(logger=None, level: int=None):
+  """
+  Returns a hook that logs each finished stage, at DEBUG level by default.
+  """
+  import logging
+  logger = logger or logging.getLogger('cube_dbt')
+  level = logging.DEBUG if level is None else level
+  def hook(stage: str, seconds: float, counters: dict) -> None:
+    details = ''.join(f' {name}={value}' for name, value in counters.items())
+    logger.log(level, '%s took %.3fs%s', stage, seconds, details)
+  return hook
@@ -0,0 +1,108 @@
+import os
+import threading
+
+from cube_dbt.dbt import Dbt
+
+
+class ManifestWatcher:
+  """
+  Reloads a manifest file when it's rewritten, e.g. by `dbt compile`.
+
+  Changes are detected by polling the file's mtime and size, so no
+  OS-specific file notification is needed. A reload parses the new
+  manifest and builds its indexes, but takes over the `Model` objects
+  of the models that didn't change (see `ManifestIndex.reuse`), then
+  calls every registered callback with the new `Dbt` object and a
+  `ManifestDiff` of the models.
+  """
+  def __init__(self, manifest_path: str, interval: float=1.0, stream: bool=False, lean: bool=False, mmap: bool=False, catalog=None, catalog_columns: bool=False) -> None:
+    self.manifest_path = manifest_path
+    self.interval = interval
+    self.error = None
+    self._options = {
+      'stream': stream,
+      'lean': lean,
+      'mmap': mmap,
+      'catalog': catalog,
+      'catalog_columns': catalog_columns,
+    }
+    self._callbacks = []
+    self._lock = threading.Lock()
+    self._stopped = threading.Event()
+    self._thread = None
+    self._signature = self._stat()
+    self.dbt = Dbt._build_indexes(Dbt.from_file(manifest_path, **self._options))
+    pass
+
+  def _stat(self):
+    try:
+      stat = os.stat(self.manifest_path)
+    except FileNotFoundError:
+      # The file may be replaced rather than rewritten in place
+      return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+  def on_change(self, callback):
+    """
+    Registers `callback(dbt, diff)`, called after each reload.
+    Returns it, so it can be used as a decorator.
+    """
+    self._callbacks.append(callback)
+    return callback
+
+  def poll(self):
+    """
+    Reloads the manifest if its mtime or size changed since the last
+    poll. Returns the `ManifestDiff` of the reload, or `None` if the file
+    didn't change or couldn't be parsed, like when it's caught halfway
+    through being written; `error` then holds the exception, and the
+    next change is picked up by a later poll.
+    """
+    with self._lock:
+      signature = self._stat()
+      if signature is None or signature == self._signature:
+        return None
+      self._signature = signature
+      try:
+        dbt = Dbt.from_file(self.manifest_path, **self._options)
+      except ValueError as error:
+        self.error = error
+        return None
+      self.error = None
+      dbt._index.set_render_cache(self.dbt._index.render_cache)
+      diff = dbt._index.reuse(self.dbt._index)
+      self.dbt = dbt
+    for callback in self._callbacks:
+      callback(dbt, diff)
+    return diff
+
+  def _run(self) -> None:
+    while not self._stopped.wait(self.interval):
+      try:
+        self.poll()
+      except Exception as error:
+        # Keep watching after read errors or failing callbacks
+        self.error = error
+
+  def start(self) -> 'ManifestWatcher':
+    """
+    Polls the manifest every `interval` seconds on a daemon thread.
+    """
+    if self._thread is None:
+      self._stopped.clear()
+      self._thread = threading.Thread(target=self._run, name='cube_dbt-watch', daemon=True)
+      self._thread.start()
+    return self
+
+  def stop(self) -> None:
+    self._stopped.set()
+    if self._thread is not None:
+      self._thread.join()
+      self._thread = None
+
+  def __enter__(self) -> 'ManifestWatcher':
+    return self.start()
+
+  def __exit__(self, *exc_info) -> bool:
+    self.stop()
+    return False
@@ -0,0 +1,92 @@
+import json
+import os
+
+from cube_dbt import cache as cache_module
+from cube_dbt.cache import FORMAT_VERSION, ManifestCache, file_digest
+
+class TestManifestCache:
+  def _write(self, path, data):
+    with open(path, 'w') as file:
+      file.write(data)
+    return os.stat(path)
+
+  def test_round_trip(self, tmp_path):
+    manifest_path = str(tmp_path / 'manifest.json')
+    stat = self._write(manifest_path, '{"nodes": {}}')
+    cache = ManifestCache(str(tmp_path / 'cache'))
+    assert cache.load(manifest_path) is None
+
+    cache.save(manifest_path, stat, file_digest(manifest_path), {'nodes': {}}, {'model': {}})
+    snapshot = cache.load(manifest_path)
+    assert snapshot['manifest'] == {'nodes': {}}
+    assert snapshot['test_index'] == {'model': {}}
+    assert not any(name.endswith('.tmp') for name in os.listdir(cache.directory))
+
+  def test_stale_when_content_changes(self, tmp_path):
+    """
+    Same size and mtime but different content is a miss
+    """
+    manifest_path = str(tmp_path / 'manifest.json')
+    stat = self._write(manifest_path, '{"nodes": {"a": 1}}')
+    cache = ManifestCache(str(tmp_path / 'cache'))
+    cache.save(manifest_path, stat, file_digest(manifest_path), {'nodes': {}}, {})
+
+    self._write(manifest_path, '{"nodes": {"b": 1}}')
+    os.utime(manifest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.load(manifest_path) is None
+
+  def test_stale_when_mtime_changes(self, tmp_path):
+    manifest_path = str(tmp_path / 'manifest.json')
+    stat = self._write(manifest_path, '{"nodes": {}}')
+    cache = ManifestCache(str(tmp_path / 'cache'))
+    cache.save(manifest_path, stat, file_digest(manifest_path), {'nodes': {}}, {})
+
+    os.utime(manifest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.load(manifest_path) is None
+
+  def test_corrupt_snapshot(self, tmp_path):
+    manifest_path = str(tmp_path / 'manifest.json')
+    self._write(manifest_path, '{"nodes": {}}')
+    cache = ManifestCache(str(tmp_path / 'cache'))
+    with open(cache._snapshot_path(manifest_path), 'wb') as file:
+      file.write(b'not a snapshot')
+    assert cache.load(manifest_path) is None
+
+  def test_json_format(self, tmp_path):
+    """
+    Snapshots are JSON, so reading one never runs code
+    """
+    manifest_path = str(tmp_path / 'manifest.json')
+    stat = self._write(manifest_path, '{"nodes": {}}')
+    cache = ManifestCache(str(tmp_path / 'cache'))
+    cache.save(manifest_path, stat, file_digest(manifest_path), {'nodes': {}}, {})
+    with open(cache._snapshot_path(manifest_path), 'rb') as file:
+      header, body = file.read().split(b'\n')
+    assert json.loads(header)['format'] == FORMAT_VERSION
+    assert json.loads(body) == {'manifest': {'nodes': {}}, 'test_index': {}}
+
+  def test_stale_header_skips_body(self, tmp_path, monkeypatch):
+    """
+    A stale snapshot is rejected from its header, without parsing the body
+    """
+    manifest_path = str(tmp_path / 'manifest.json')
+    stat = self._write(manifest_path, '{"nodes": {}}')
+    cache = ManifestCache(str(tmp_path / 'cache'))
+    cache.save(manifest_path, stat, file_digest(manifest_path), {'nodes': {}}, {})
+    parsed = []
+    loads_body = cache_module._loads_body
+    monkeypatch.setattr(cache_module, '_loads_body', lambda data: parsed.append(data) or loads_body(data))
+
+    os.utime(manifest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.load(manifest_path) is None
+    assert parsed == []
+
+  def test_load_url(self, tmp_path):
+    cache = ManifestCache(str(tmp_path / 'cache'))
+    assert cache.load_url('https://example.com/manifest.json') is None
+    cache.save_url('https://example.com/manifest.json', {'etag': '"v1"'}, {'nodes': {}}, {})
+    cached = cache.load_url('https://example.com/manifest.json')
+    assert cached.header['etag'] == '"v1"'
+    snapshot = cached.read()
+    assert snapshot['etag'] == '"v1"'
+    assert snapshot['manifest'] == {'nodes': {}}
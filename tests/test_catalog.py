@@ -0,0 +1,119 @@
+import json
+import os
+
+from cube_dbt import Dbt
+from cube_dbt.catalog import apply_catalog, catalog_index
+from cube_dbt.column import TypeResolver
+
+directory_path = os.path.dirname(os.path.realpath(__file__))
+
+CATALOG = {
+  'metadata': {'dbt_schema_version': 'https://schemas.getdbt.com/dbt/catalog/v1.json'},
+  'nodes': {
+    'model.jaffle_shop.orders_copy': {
+      'metadata': {'type': 'VIEW', 'schema': 'public', 'name': 'orders_copy'},
+      'columns': {
+        'DISCOUNT': {'type': 'numeric', 'index': 6, 'name': 'DISCOUNT', 'comment': 'Applied discount'},
+        'SEARCH': {'type': 'tsvector', 'index': 7, 'name': 'SEARCH', 'comment': None},
+        'ID': {'type': 'integer', 'index': 1, 'name': 'ID', 'comment': None},
+        'CREATED_AT': {'type': 'timestamp without time zone', 'index': 5, 'name': 'CREATED_AT', 'comment': None},
+        'STATUS': {'type': 'tsvector', 'index': 3, 'name': 'STATUS', 'comment': None},
+      },
+      'stats': {},
+    },
+    'seed.jaffle_shop.raw_orders': {
+      'metadata': {'type': 'BASE TABLE', 'schema': 'public', 'name': 'raw_orders'},
+      'columns': {'id': {'type': 'integer', 'index': 1, 'name': 'id', 'comment': None}},
+      'stats': {},
+    },
+  },
+  'sources': {},
+}
+
+def _manifest_without_types(tmp_path) -> str:
+  """
+  The test manifest, with orders_copy.id and created_at undocumented
+  """
+  with open(directory_path + '/manifest.json') as file:
+    manifest = json.load(file)
+  columns = manifest['nodes']['model.jaffle_shop.orders_copy']['columns']
+  del columns['id']['data_type']
+  columns['created_at']['data_type'] = None
+  manifest_path = str(tmp_path / 'manifest.json')
+  with open(manifest_path, 'w') as file:
+    json.dump(manifest, file)
+  return manifest_path
+
+def _catalog_path(tmp_path) -> str:
+  catalog_path = str(tmp_path / 'catalog.json')
+  with open(catalog_path, 'w') as file:
+    json.dump(CATALOG, file)
+  return catalog_path
+
+class TestCatalog:
+  def test_catalog_index(self):
+    index = catalog_index(CATALOG)
+    assert list(index) == ['model.jaffle_shop.orders_copy']
+    columns = index['model.jaffle_shop.orders_copy']
+    assert list(columns) == ['id', 'status', 'created_at', 'discount', 'search']
+    assert columns['discount'] == {'name': 'DISCOUNT', 'data_type': 'numeric', 'description': 'Applied discount'}
+
+  def test_apply_catalog(self):
+    """
+    Missing types are filled, documented ones win, unknown ones are left out
+    """
+    node = {
+      'name': 'orders',
+      'columns': {
+        'id': {'name': 'id', 'meta': {}, 'tags': []},
+        'status': {'name': 'status', 'meta': {}, 'tags': []},
+        'created_at': {'name': 'created_at', 'data_type': 'date', 'meta': {}, 'tags': []},
+      }
+    }
+    columns = catalog_index(CATALOG)['model.jaffle_shop.orders_copy']
+    resolver = TypeResolver.for_adapter('postgres')
+    applied, filled, added = apply_catalog(node, columns, resolver)
+    assert (filled, added) == (1, 0)
+    assert applied['columns']['id']['data_type'] == 'integer'
+    assert 'data_type' not in applied['columns']['status']
+    assert applied['columns']['created_at']['data_type'] == 'date'
+    assert 'data_type' not in node['columns']['id']
+
+    applied, filled, added = apply_catalog(node, columns, resolver, add_columns=True)
+    assert (filled, added) == (1, 2)
+    assert list(applied['columns']) == ['id', 'status', 'created_at', 'DISCOUNT', 'SEARCH']
+    assert 'data_type' not in applied['columns']['SEARCH']
+
+    assert apply_catalog(node, {}, resolver) == (node, 0, 0)
+
+  def test_from_file_with_catalog(self, tmp_path):
+    manifest_path = _manifest_without_types(tmp_path)
+    catalog_path = _catalog_path(tmp_path)
+    assert Dbt.from_file(manifest_path).model('orders_copy').column('id').type == 'string'
+
+    for options in [{}, {'stream': True}, {'lean': True}, {'cache_dir': str(tmp_path / 'cache')}]:
+      dbt = Dbt.from_file(manifest_path, catalog=catalog_path, **options)
+      model = dbt.model('orders_copy')
+      assert [column.name for column in model.columns] == ['id', 'user_id', 'status', 'completed_at', 'created_at']
+      assert model.column('id').type == 'number'
+      assert model.column('created_at').type == 'time'
+      assert model.column('status').type == 'string'
+      assert 'data_type' not in dbt.manifest['nodes']['model.jaffle_shop.orders_copy']['columns']['id']
+
+  def test_catalog_columns(self, tmp_path):
+    manifest_path = _manifest_without_types(tmp_path)
+    with open(_catalog_path(tmp_path), 'rb') as catalog:
+      dbt = Dbt.from_file(manifest_path, catalog=catalog, catalog_columns=True)
+    model = dbt.model('orders_copy')
+    assert [column.name for column in model.columns][-2:] == ['DISCOUNT', 'SEARCH']
+    assert model.column('DISCOUNT').type == 'number'
+    assert model.column('DISCOUNT').description == 'Applied discount'
+    assert model.column('SEARCH').type == 'string'
+    assert 'DISCOUNT' in dbt.render_cubes()
+    assert dbt.render_cubes() == dbt.render_cubes(processes=2)
+
+  def test_catalog_changes_state(self, tmp_path):
+    manifest_path = _manifest_without_types(tmp_path)
+    previous = Dbt.from_file(manifest_path)
+    diff = Dbt.from_file(manifest_path, catalog=_catalog_path(tmp_path)).diff(previous)
+    assert diff.changed == {'model.jaffle_shop.orders_copy'}
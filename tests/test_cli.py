@@ -0,0 +1,14 @@
+import os
+
+from cube_dbt import Dbt
+from cube_dbt.cli import main
+
+class TestCli:
+  def test_preprocess(self, tmp_path, capsys):
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    output_path = str(tmp_path / 'manifest.json')
+    assert main(['preprocess', directory_path + '/manifest.json', output_path, '--tag', 'cube']) == 0
+    assert 'Wrote 2 models and 2 tests' in capsys.readouterr().err
+
+    dbt = Dbt.from_file(output_path)
+    assert list(model.name for model in dbt.models) == ['orders_copy', 'products_copy']
@@ -1,5 +1,6 @@
 from pytest import raises
 from cube_dbt import Column
+from cube_dbt.column import _CUSTOM_TYPE_MAPPINGS, TypeResolver, register_type_mapping
 
 class TestColumn:
   def test_no_type(self):
@@ -120,3 +121,64 @@ class TestColumn:
         sql: column
         type: number
         """
+
+  def test_known_type_with_nested_parameters(self):
+    column_dict = {
+      'data_type': 'STRUCT<amount NUMERIC(10, 2), tags ARRAY<STRING>>'
+    }
+    column = Column('model', column_dict)
+    assert column.type == 'string'
+
+  def test_known_type_with_text_after_parameters(self):
+    column_dict = {
+      'data_type': 'TIMESTAMP(3)  WITH TIME ZONE'
+    }
+    column = Column('model', column_dict)
+    assert column.type == 'time'
+
+  def test_adapter_specific_type(self):
+    """
+    Mappings of the manifest's adapter take precedence
+    """
+    column_dict = {
+      'name': 'column',
+      'data_type': 'geography'
+    }
+    assert Column('model', column_dict).type == 'geo'
+    assert Column('model', column_dict, type_resolver=TypeResolver.for_adapter('bigquery')).type == 'geo'
+    assert Column('model', column_dict, type_resolver=TypeResolver.for_adapter('redshift')).type == 'string'
+    column_dict = {
+      'name': 'column',
+      'data_type': 'geometry'
+    }
+    assert Column('model', column_dict, type_resolver=TypeResolver.for_adapter('Redshift')).type == 'geo'
+    assert Column('model', column_dict, type_resolver=TypeResolver.for_adapter('snowflake')).type == 'string'
+
+  def test_custom_type_mapping(self):
+    column_dict = {
+      'name': 'column',
+      'data_type': 'HUGEINT'
+    }
+    resolver = TypeResolver.for_adapter('duckdb')
+    column = Column('model', column_dict, type_resolver=resolver)
+    with raises(RuntimeError):
+      column.type
+    try:
+      register_type_mapping('hugeint', 'number', adapter_type='duckdb')
+      assert column.type == 'number'
+      with raises(RuntimeError):
+        Column('model', column_dict, type_resolver=TypeResolver.for_adapter('postgres')).type
+    finally:
+      _CUSTOM_TYPE_MAPPINGS.clear()
+      resolver.reset()
+
+  def test_custom_type_mapping_invalid(self):
+    with raises(ValueError):
+      register_type_mapping('hugeint', 'integer')
+
+  def test_no_instance_dict(self):
+    """
+    Columns use __slots__ to stay small
+    """
+    column = Column('model', {'name': 'id', 'data_type': 'integer'})
+    assert not hasattr(column, '__dict__')
@@ -1,4 +1,9 @@
-import os 
+import io
+import json
+import os
+import shutil
+
+import yaml
 
 from pytest import raises
 from cube_dbt import Dbt
@@ -214,4 +219,421 @@ class TestDbt:
     # products_copy should have id as primary key (from constraints)
     products_model = dbt.model('products_copy')
     assert len(products_model.primary_key) == 1
-    assert products_model.primary_key[0].name == 'id'
\ No newline at end of file
+    assert products_model.primary_key[0].name == 'id'
+
+  def test_from_file_stream(self):
+    """
+    Streaming load keeps the same models and primary keys
+    """
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    dbt = Dbt.from_file(directory_path + '/manifest.json', stream=True)
+    model_names = list(model.name for model in dbt.models)
+    assert model_names == [
+      'users_copy',
+      'orders_copy',
+      'line_items_copy',
+      'products_copy'
+    ]
+    assert dbt.model('orders_copy').primary_key[0].name == 'id'
+    assert list(dbt.manifest.keys()) == ['nodes', 'metadata']
+
+  def test_from_file_stream_filter_pushdown(self):
+    """
+    Streaming load drops non-matching nodes while parsing
+    """
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    dbt = Dbt.from_file(directory_path + '/manifest.json', stream=True, names=['orders_copy'])
+    assert list(model.name for model in dbt.models) == ['orders_copy']
+    assert sorted(node['resource_type'] for node in dbt.manifest['nodes'].values()) == [
+      'model',
+      'test',
+      'test'
+    ]
+    assert dbt.model('orders_copy').primary_key[0].name == 'id'
+
+  def test_from_file_object(self):
+    """
+    Any binary or text file-like object can be loaded
+    """
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    with open(directory_path + '/manifest.json', 'rb') as file:
+      data = file.read()
+    for stream in [False, True]:
+      for file in [io.BytesIO(data), io.StringIO(data.decode('utf-8'))]:
+        dbt = Dbt.from_file(file, stream=stream, tags=['cube'])
+        assert list(model.name for model in dbt.models) == ['orders_copy', 'products_copy']
+
+  def test_from_file_lean(self):
+    """
+    Lean loads keep only the projected models and render the same cubes
+    """
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    expected = Dbt.from_file(directory_path + '/manifest.json').render_cubes()
+    for stream in [False, True]:
+      dbt = Dbt.from_file(directory_path + '/manifest.json', stream=stream, lean=True)
+      assert dbt.render_cubes() == expected
+      assert sorted(dbt.manifest.keys()) == ['metadata', 'nodes']
+      assert set(node['resource_type'] for node in dbt.manifest['nodes'].values()) == {'model'}
+      assert 'compiled_code' not in dbt.model('orders_copy')._model_dict
+      assert dbt.model('orders_copy').primary_key[0].name == 'id'
+
+    dbt = Dbt.from_file(directory_path + '/manifest.json', stream=True, lean=True, tags=['cube'])
+    assert list(model.name for model in dbt.models) == ['orders_copy', 'products_copy']
+    assert len(dbt.manifest['nodes']) == 2
+
+  def test_from_file_mmap(self):
+    """
+    Memory-mapped loads parse the same manifest
+    """
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    expected = Dbt.from_file(directory_path + '/manifest.json')
+    for lean in [False, True]:
+      dbt = Dbt.from_file(directory_path + '/manifest.json', mmap=True, lean=lean, tags=['cube'])
+      assert list(model.name for model in dbt.models) == ['orders_copy', 'products_copy']
+      assert dbt.render_cubes() == expected.filter(tags=['cube']).render_cubes()
+    assert Dbt.from_file(directory_path + '/manifest.json', mmap=True).manifest == expected.manifest
+
+  def test_from_file_cache(self, tmp_path):
+    """
+    The first load writes a snapshot, later loads reuse it
+    """
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    manifest_path = str(tmp_path / 'manifest.json')
+    shutil.copy(directory_path + '/manifest.json', manifest_path)
+    cache_dir = str(tmp_path / 'cache')
+
+    for stream in [False, True]:
+      dbt = Dbt.from_file(manifest_path, stream=stream, cache_dir=cache_dir)
+      assert list(model.name for model in dbt.models) == [
+        'users_copy',
+        'orders_copy',
+        'line_items_copy',
+        'products_copy'
+      ]
+      assert dbt.model('orders_copy').primary_key[0].name == 'id'
+      assert dbt.model('products_copy').primary_key[0].name == 'id'
+      assert 'compiled_code' not in dbt.model('orders_copy')._model_dict
+      assert len(os.listdir(cache_dir)) == 1
+
+    dbt = Dbt.from_file(manifest_path, tags=['cube'], cache_dir=cache_dir)
+    assert list(model.name for model in dbt.models) == ['orders_copy', 'products_copy']
+
+  def test_preprocess(self, tmp_path):
+    """
+    A preprocessed manifest loads the same models and primary keys
+    """
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    output_path = str(tmp_path / 'manifest.json')
+    stats = Dbt.preprocess(directory_path + '/manifest.json', output_path)
+    assert stats['models'] == 4
+    assert stats['tests'] == 2
+    assert stats['output_bytes'] < stats['input_bytes'] / 10
+
+    dbt = Dbt.from_file(output_path)
+    assert list(dbt.manifest.keys()) == ['nodes', 'metadata']
+    assert list(model.name for model in dbt.models) == [
+      'users_copy',
+      'orders_copy',
+      'line_items_copy',
+      'products_copy'
+    ]
+    assert dbt.model('orders_copy').primary_key[0].name == 'id'
+    assert dbt.model('products_copy').primary_key[0].name == 'id'
+
+  def test_preprocess_with_filter(self):
+    """
+    Tests of models that are filtered out are dropped too
+    """
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    output = io.BytesIO()
+    stats = Dbt.preprocess(directory_path + '/manifest.json', output, names=['users_copy'])
+    assert stats['models'] == 1
+    assert stats['tests'] == 0
+    output.seek(0)
+    assert list(model.name for model in Dbt.from_file(output).models) == ['users_copy']
+
+  def test_tests_attach_by_unique_id(self):
+    """
+    Tests attach to the model's unique_id, so same-named models in two
+    packages and versions of a model don't share them, and `attached_node`
+    wins over other dependencies
+    """
+    def model(name, path, version=None):
+      return {
+        'name': name,
+        'resource_type': 'model',
+        'config': {'materialized': 'table', 'tags': []},
+        'path': path,
+        'database': 'db',
+        'schema': 'public',
+        'version': version,
+        'columns': {'id': {'name': 'id', 'description': '', 'data_type': 'integer', 'meta': {}, 'tags': []}}
+      }
+    def test(name, depends_on, attached_node=None):
+      node = {
+        'resource_type': 'test',
+        'test_metadata': {'name': name, 'kwargs': {'column_name': 'id'}},
+        'depends_on': {'nodes': depends_on}
+      }
+      if attached_node:
+        node['attached_node'] = attached_node
+      return node
+    manifest = {
+      'nodes': {
+        'model.shop.orders': model('orders', 'shop/orders.sql'),
+        'model.billing.orders': model('orders', 'billing/orders.sql'),
+        'model.shop.customers.v2': model('customers', 'shop/customers_v2.sql', 2),
+        'test.shop.unique_orders_id': test('unique', ['model.shop.orders']),
+        'test.shop.not_null_orders_id': test('not_null', ['model.shop.orders']),
+        'test.shop.relationships': test(
+          'relationships',
+          ['model.shop.customers.v2', 'model.billing.orders'],
+          attached_node='model.billing.orders'
+        ),
+        'test.shop.unique_customers_id': test('unique', ['model.shop.customers.v2'])
+      }
+    }
+    dbt = Dbt(manifest)
+    shop_orders = dbt.model_by_unique_id('model.shop.orders')
+    billing_orders = dbt.model_by_unique_id('model.billing.orders')
+    assert shop_orders.primary_key[0].name == 'id'
+    assert billing_orders.primary_key == []
+    assert billing_orders.column('id')._tests == ['relationships']
+    assert dbt.model('customers').column('id')._tests == ['unique']
+
+  def test_filter_by_path_prefix(self):
+    """
+    Path filters match any prefix, not only whole directories
+    """
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    dbt = Dbt.from_file(directory_path + '/manifest.json')
+    paths = sorted(model._model_dict['path'] for model in dbt.models)
+    prefix = paths[0][:-3]
+    expected = [model.name for model in dbt.models if model._model_dict['path'].startswith(prefix)]
+    assert [model.name for model in dbt.filter(paths=[prefix]).models] == expected
+    assert dbt.filter(paths=['nothing/']).models == []
+    assert dbt.filter(paths=['nothing/', prefix]).models == dbt.filter(paths=[prefix]).models
+
+  def test_model_versions(self):
+    """
+    A bare name resolves to the latest version, regardless of node order
+    """
+    manifest = {
+      'nodes': {
+        'model.jaffle_shop.orders.v3': {
+          'name': 'orders',
+          'resource_type': 'model',
+          'config': {
+            'materialized': 'table'
+          },
+          'path': 'marts/orders_v3.sql',
+          'version': 3,
+          'latest_version': 2
+        },
+        'model.jaffle_shop.orders.v2': {
+          'name': 'orders',
+          'resource_type': 'model',
+          'config': {
+            'materialized': 'table'
+          },
+          'path': 'marts/orders_v2.sql',
+          'version': 2,
+          'latest_version': 2
+        },
+        'model.jaffle_shop.orders.v1': {
+          'name': 'orders',
+          'resource_type': 'model',
+          'config': {
+            'materialized': 'table'
+          },
+          'path': 'marts/orders_v1.sql',
+          'version': 1,
+          'latest_version': 2
+        }
+      }
+    }
+    dbt = Dbt(manifest)
+    assert dbt.model('orders')._model_dict['version'] == 2
+    assert dbt.model('orders', version=1)._model_dict['version'] == 1
+    assert dbt.model('orders', version='3')._model_dict['version'] == 3
+    assert dbt.model('orders') is dbt.model_by_unique_id('model.jaffle_shop.orders.v2')
+    with raises(StopIteration):
+      dbt.model('orders', version=4)
+
+    # Without latest_version, the highest version wins
+    for node in manifest['nodes'].values():
+      node['latest_version'] = None
+    assert Dbt(manifest).model('orders')._model_dict['version'] == 3
+
+  def test_render_cubes_with_versions(self):
+    """
+    Only the version a name resolves to becomes a cube, so cube names are unique
+    """
+    def node(version, materialized='table', name='orders'):
+      return {
+        'name': name,
+        'description': f'v{version}',
+        'resource_type': 'model',
+        'config': {'materialized': materialized, 'tags': []},
+        'path': f'marts/{name}_v{version}.sql',
+        'database': 'db',
+        'schema': 'public',
+        'alias': f'{name}_v{version}',
+        'relation_name': f'"db"."public"."{name}_v{version}"',
+        'columns': {},
+        'version': version,
+        'latest_version': 2,
+      }
+    manifest = {
+      'nodes': {
+        'model.jaffle_shop.orders.v1': node(1),
+        'model.jaffle_shop.orders.v2': node(2),
+        'model.jaffle_shop.orders.v3': node(3),
+        'model.jaffle_shop.users': {**node(None, name='users'), 'latest_version': None},
+      }
+    }
+    dbt = Dbt(manifest)
+    for processes in [None, 2]:
+      cubes = yaml.safe_load(dbt.render_cubes(processes=processes))['cubes']
+      assert [(cube['name'], cube['description']) for cube in cubes] == [('orders', 'v2'), ('users', 'vNone')]
+    assert len(dbt.models) == 4
+
+  def test_model_not_found(self):
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    dbt = Dbt.from_file(directory_path + '/manifest.json')
+    with raises(StopIteration):
+      dbt.model('missing')
+    with raises(StopIteration):
+      dbt.model_by_unique_id('model.jaffle_shop.missing')
+
+  def test_iter_models_is_lazy(self):
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    dbt = Dbt.from_file(directory_path + '/manifest.json')
+    assert next(dbt.iter_models()).name == 'users_copy'
+    assert len(dbt._index._models) == 1
+    assert dbt.models[0] is dbt.model('users_copy')
+
+  def test_filter_returns_view(self):
+    """
+    Filtering returns a new view and leaves the original selection intact
+    """
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    dbt = Dbt.from_file(directory_path + '/manifest.json')
+    assert len(dbt.models) == 4
+
+    cube = dbt.filter(tags=['cube'])
+    example = dbt.filter(paths=['example/'])
+    assert list(model.name for model in cube.models) == ['orders_copy', 'products_copy']
+    assert list(model.name for model in example.models) == ['users_copy', 'products_copy']
+    assert len(dbt.models) == 4
+
+    # Views share the parsed manifest and the built models
+    assert cube.manifest is dbt.manifest
+    assert cube.model('products_copy') is example.model('products_copy')
+    assert cube.model('products_copy') is dbt.model('products_copy')
+    with raises(StopIteration):
+      cube.model('users_copy')
+
+  def test_filter_combines_indexes(self):
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    dbt = Dbt.from_file(directory_path + '/manifest.json')
+    assert list(model.name for model in dbt.filter(tags=['cube', 'b']).models) == ['products_copy']
+    assert list(model.name for model in dbt.filter(tags=['cube', 'missing']).models) == []
+    assert list(model.name for model in dbt.filter(
+      paths=['another/'],
+      tags=['cube'],
+      names=['orders_copy', 'products_copy', 'line_items_copy']
+    ).models) == ['orders_copy']
+
+  def test_adapter_type_mappings(self):
+    """
+    Column types are resolved with the mappings of the manifest's adapter
+    """
+    manifest = {
+      'metadata': {
+        'adapter_type': 'redshift'
+      },
+      'nodes': {
+        'model.jaffle_shop.stores': {
+          'name': 'stores',
+          'resource_type': 'model',
+          'config': {
+            'materialized': 'table'
+          },
+          'path': 'example/stores.sql',
+          'columns': {
+            'location': {
+              'name': 'location',
+              'data_type': 'GEOGRAPHY',
+              'tags': []
+            },
+            'area': {
+              'name': 'area',
+              'data_type': 'GEOMETRY',
+              'tags': []
+            }
+          }
+        }
+      }
+    }
+    model = Dbt(manifest).model('stores')
+    assert model.column('location').type == 'string'
+    assert model.column('area').type == 'geo'
+
+  def test_render_cubes(self):
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    dbt = Dbt.from_file(directory_path + '/manifest.json').filter(tags=['cube'])
+    output = dbt.render_cubes(skip={'orders_copy': ['status']})
+    document = yaml.safe_load(output)
+    assert list(cube['name'] for cube in document['cubes']) == ['orders_copy', 'products_copy']
+
+    orders = document['cubes'][0]
+    assert orders['sql_table'] == dbt.model('orders_copy').sql_table
+    assert 'status' not in list(dimension['name'] for dimension in orders['dimensions'])
+    assert orders['dimensions'] == list(
+      dimension for dimension in dbt.model('orders_copy')._as_dimensions()
+      if dimension['name'] != 'status'
+    )
+    assert document['cubes'][1]['dimensions'] == dbt.model('products_copy')._as_dimensions()
+    assert output.startswith('cubes:\n- name: orders_copy\n  sql_table: ')
+
+  def test_render_cubes_in_parallel(self):
+    """
+    Rendering across processes gives the same document as rendering serially
+    """
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    dbt = Dbt.from_file(directory_path + '/manifest.json')
+    skip = {'orders_copy': ['status']}
+    assert dbt.render_cubes(skip=skip, processes=2) == dbt.render_cubes(skip=skip)
+    assert dbt.filter(names=['missing']).render_cubes(processes=2) == 'cubes: []\n'
+
+  def test_diff(self, tmp_path):
+    directory_path = os.path.dirname(os.path.realpath(__file__))
+    with open(directory_path + '/manifest.json', 'rb') as file:
+      data = file.read()
+    previous = Dbt.from_file(io.BytesIO(data))
+
+    manifest = json.loads(data)
+    nodes = manifest['nodes']
+    nodes['model.jaffle_shop.orders_copy']['columns']['status']['description'] = 'Order status'
+    # SQL-only changes don't affect the rendered cube
+    nodes['model.jaffle_shop.users_copy']['raw_code'] += '\n-- comment'
+    nodes['model.jaffle_shop.users_copy']['checksum']['checksum'] = 'changed'
+    del nodes['model.jaffle_shop.line_items_copy']
+    nodes['model.jaffle_shop.stores'] = dict(nodes['model.jaffle_shop.products_copy'], name='stores')
+    current = Dbt(manifest)
+
+    diff = current.diff(previous)
+    assert diff.added == {'model.jaffle_shop.stores'}
+    assert diff.removed == {'model.jaffle_shop.line_items_copy'}
+    assert diff.changed == {'model.jaffle_shop.orders_copy'}
+
+    state_path = str(tmp_path / 'state.json')
+    previous.save_state(state_path)
+    assert current.diff(state_path).changed == diff.changed
+    assert not previous.diff(state_path)
+
+    diff, rendered = current.render_changed(state_path)
+    assert sorted(rendered) == ['model.jaffle_shop.orders_copy', 'model.jaffle_shop.stores']
+    assert 'description: Order status' in rendered['model.jaffle_shop.orders_copy']
+    assert yaml.safe_load(rendered['model.jaffle_shop.stores'])['cubes'][0]['name'] == 'stores'
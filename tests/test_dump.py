@@ -1,4 +1,8 @@
-from cube_dbt.dump import indent_string
+import random
+import string
+
+import yaml
+from cube_dbt.dump import Dumper, SafeString, dump, indent_string
 
 class TestIndentString:
   def test_single_line_string(self):
@@ -15,4 +19,130 @@ class TestIndentString:
     """
     input = 'abc\ndef\nghi'
     output = indent_string(input, 2)
-    assert output == 'abc\n  def\n  ghi'
\ No newline at end of file
+    assert output == 'abc\n  def\n  ghi'
+
+def reference_dump(data, indent: int=0) -> str:
+  """
+  The original implementation of `dump`, based on PyYAML only
+  """
+  dump = yaml.dump(
+    data,
+    Dumper=Dumper,
+    sort_keys=False,
+    default_flow_style=False,
+    allow_unicode=True,
+    indent=0
+  )
+  return '\n'.join(
+    (' ' * indent if i > 0 else '') +
+    s for i, s in enumerate(dump.split('\n'))
+  )
+
+LONG_DESCRIPTION = (
+  'The unique identifier of a customer, as assigned by the CRM when the account '
+  'was created. Used to join orders, payments, and support tickets together.'
+)
+
+class TestDump:
+  def assert_identical(self, data, indent: int=0):
+    output = dump(data, indent)
+    assert isinstance(output, SafeString)
+    assert output == reference_dump(data, indent)
+
+  def test_cube(self):
+    self.assert_identical({
+      'name': 'orders',
+      'description': LONG_DESCRIPTION,
+      'sql_table': '"db"."schema"."orders"'
+    }, indent=4)
+
+  def test_dimensions(self):
+    self.assert_identical([
+      {
+        'name': 'id',
+        'description': LONG_DESCRIPTION,
+        'sql': 'id',
+        'type': 'number',
+        'primary_key': True
+      },
+      {
+        'name': 'status',
+        'sql': 'status',
+        'type': 'string',
+        'meta': {
+          'format': 'id',
+          'weight': 0.5,
+          'large': 1e17,
+          'count': 3,
+          'missing': None,
+          'hidden': False,
+          'tags': ['a', ['b', 'c'], {'d': []}, {}],
+          'nested': {'list': [{'a': 1, 'b': [1, 2]}], 'empty': {}}
+        }
+      }
+    ], indent=6)
+
+  def test_scalars_needing_quotes(self):
+    values = [
+      '', ' ', 'true', 'No', 'null', '~', '1', '1.5', '0x1f', '2020-01-01', '.inf',
+      '12:30:00', '<<', '=', '---', '...', '- a', '? a', ': a', 'a: b', 'a #b', 'a:',
+      '#a', '"quoted"', "it's", "'", ' leading', 'trailing ', '@at', '`tick`', '*star',
+      'ümlaut ☃', 'emoji 😀', 'tab\there', 'line\nbreak', 'bom\ufeff', 'nel\x85'
+    ]
+    self.assert_identical([{'value': value} for value in values], indent=8)
+    self.assert_identical({value: 'key' for value in values if value}, indent=2)
+
+  def test_line_wrapping(self):
+    words = ['a', 'bb', "c'c", 'ddd', 'x' * 30]
+    for width in range(60, 130, 7):
+      text = ' '.join(words[i % len(words)] for i in range(width))[:width]
+      self.assert_identical({'description': text.strip()}, indent=4)
+      self.assert_identical([text.strip()], indent=4)
+      self.assert_identical([{'description': "'" + text + "'"}], indent=4)
+
+  def test_yaml_line_breaks(self):
+    """
+    U+2028 and U+2029 are line breaks in YAML 1.1
+    """
+    data = {'cubes': [{'name': 'o', 'dimensions': [{'name': 'id', 'description': 'first\u2028second\u2029third', 'sql': 'id'}]}]}
+    self.assert_identical(data)
+    assert yaml.safe_load(dump(data)) == data
+
+  def test_simple_key_length(self):
+    """
+    Keys of 123 characters or more, with the `!!str` tag, are complex keys
+    """
+    for size in range(118, 130):
+      self.assert_identical({'meta': {'a' * size: 1}})
+      self.assert_identical({'meta': {"'" + 'a' * size: 1}})
+
+  def test_unsupported_shapes(self):
+    shared = {'a': 1}
+    self.assert_identical([shared, shared])
+    self.assert_identical({'a': (1, 2)})
+    self.assert_identical({'a': SafeString('b')})
+    self.assert_identical({'x' * 200: 1})
+    self.assert_identical('scalar')
+    self.assert_identical([])
+    self.assert_identical({})
+
+  def test_random(self):
+    alphabet = string.ascii_letters + string.digits + ' ' * 12 + '.,:#-?\'"_()[]{}!|>%@&*~`\n\té☃😀\u2028\u2029'
+    generator = random.Random(0)
+
+    def random_string():
+      size = generator.choice([0, 1, 3, 10, 40, 79, 80, 81, 120])
+      return ''.join(generator.choice(alphabet) for _ in range(size))
+
+    def random_value(depth=0):
+      choice = generator.random()
+      if depth < 3 and choice < 0.25:
+        return {random_string(): random_value(depth + 1) for _ in range(generator.randint(0, 4))}
+      if depth < 3 and choice < 0.5:
+        return [random_value(depth + 1) for _ in range(generator.randint(0, 4))]
+      if choice < 0.6:
+        return generator.choice([True, False, None, 0, -7, 2.5, float('inf'), float('nan'), 1e-7])
+      return random_string()
+
+    for _ in range(2000):
+      self.assert_identical(random_value(), indent=generator.choice([0, 4, 6, 8]))
@@ -0,0 +1,97 @@
+import json
+import os
+
+import yaml
+
+from pytest import raises
+from cube_dbt import Dbt
+from cube_dbt.federation import merge_manifests, name_collisions, project_of
+
+directory_path = os.path.dirname(os.path.realpath(__file__))
+
+def _billing_manifest() -> dict:
+  """
+  A second project with copies of the test models, and a reference to an
+  upstream model without its columns, like cross-project refs
+  """
+  with open(directory_path + '/manifest.json') as file:
+    manifest = json.loads(file.read().replace('jaffle_shop', 'billing'))
+  manifest['nodes']['model.jaffle_shop.orders_copy'] = {
+    'name': 'orders_copy',
+    'resource_type': 'model',
+    'package_name': 'jaffle_shop',
+    'path': 'orders_copy.sql',
+    'config': {'materialized': 'table', 'tags': []},
+    'columns': {}
+  }
+  return manifest
+
+class TestFederation:
+  def test_project_of(self):
+    assert project_of('model.jaffle_shop.orders.v2') == 'jaffle_shop'
+    assert project_of('orders') == ''
+
+  def test_from_manifests(self, tmp_path):
+    billing_path = str(tmp_path / 'billing.json')
+    with open(billing_path, 'w') as file:
+      json.dump(_billing_manifest(), file)
+
+    for options in [{}, {'stream': True}, {'lean': True}]:
+      dbt = Dbt.from_manifests([directory_path + '/manifest.json', billing_path], **options)
+      assert [model.name for model in dbt.models] == [
+        'users_copy', 'orders_copy', 'line_items_copy', 'products_copy',
+        'users_copy', 'orders_copy', 'line_items_copy', 'products_copy'
+      ]
+      # Bare names resolve to the first source, qualified names to their project
+      assert dbt.model('orders_copy') is dbt.model('jaffle_shop.orders_copy')
+      billing_orders = dbt.model('billing.orders_copy')
+      assert billing_orders is dbt.model_by_unique_id('model.billing.orders_copy')
+      assert billing_orders.primary_key[0].name == 'id'
+      # Cube names stay unique: colliding names render the first source's model
+      cubes = yaml.safe_load(dbt.render_cubes())['cubes']
+      assert [cube['name'] for cube in cubes] == ['users_copy', 'orders_copy', 'line_items_copy', 'products_copy']
+      assert cubes[1]['sql_table'] == dbt.model('jaffle_shop.orders_copy').sql_table
+
+    dbt = Dbt.from_manifests([billing_path, directory_path + '/manifest.json'], tags=['cube'])
+    assert dbt.model('orders_copy') is dbt.model('billing.orders_copy')
+    assert len(dbt.models) == 4
+    # The owning project's definition wins over the downstream reference
+    assert dbt.model('jaffle_shop.orders_copy').primary_key[0].name == 'id'
+
+  def test_collisions(self, tmp_path):
+    billing_path = str(tmp_path / 'billing.json')
+    with open(billing_path, 'w') as file:
+      json.dump(_billing_manifest(), file)
+    with raises(ValueError, match='orders_copy: model.jaffle_shop.orders_copy, model.billing.orders_copy'):
+      Dbt.from_manifests([directory_path + '/manifest.json', billing_path], collisions='error')
+    with raises(ValueError):
+      Dbt.from_manifests([], collisions='first')
+
+  def test_merge_manifests(self):
+    upstream = {
+      'metadata': {'project_name': 'a', 'adapter_type': 'postgres'},
+      'nodes': {'model.a.x': {'name': 'x', 'resource_type': 'model', 'columns': {'id': {}}}}
+    }
+    downstream = {
+      'metadata': {'project_name': 'b'},
+      'nodes': {
+        'model.a.x': {'name': 'x', 'resource_type': 'model'},
+        'model.b.x': {'name': 'x', 'resource_type': 'model'},
+        'model.b.y': {'name': 'y', 'resource_type': 'model'}
+      }
+    }
+    manifest, test_index = merge_manifests([
+      (downstream, {'model.a.x': {'id': ['wrong']}, 'model.b.y': {'id': ['unique']}}),
+      (upstream, {'model.a.x': {'id': ['unique']}})
+    ])
+    assert list(manifest['nodes']) == ['model.a.x', 'model.b.x', 'model.b.y']
+    assert manifest['nodes']['model.a.x'] is upstream['nodes']['model.a.x']
+    assert test_index == {'model.a.x': {'id': ['unique']}, 'model.b.y': {'id': ['unique']}}
+    assert manifest['metadata'] == {'project_name': 'b', 'adapter_type': 'postgres'}
+    assert name_collisions(manifest['nodes']) == {'x': ['model.a.x', 'model.b.x']}
+
+    with raises(ValueError, match='different adapters'):
+      merge_manifests([
+        ({'metadata': {'adapter_type': 'postgres'}, 'nodes': {}}, {}),
+        ({'metadata': {'adapter_type': 'snowflake'}, 'nodes': {}}, {})
+      ])
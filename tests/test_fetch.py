@@ -0,0 +1,161 @@
+import asyncio
+import gzip
+import json
+import os
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+
+from pytest import fixture, raises
+from cube_dbt import Dbt
+from cube_dbt.cache import ManifestCache
+from cube_dbt.fetch import fetch
+
+directory_path = os.path.dirname(os.path.realpath(__file__))
+with open(directory_path + '/manifest.json', 'rb') as file:
+  MANIFEST = file.read()
+
+class Handler(BaseHTTPRequestHandler):
+  etag = '"v1"'
+  failures = 0
+  requests = []
+
+  def do_GET(self):
+    Handler.requests.append(dict(self.headers))
+    if Handler.failures > 0:
+      Handler.failures -= 1
+      self.send_response(503)
+      self.end_headers()
+      return
+    if self.headers.get('If-None-Match') == Handler.etag:
+      self.send_response(304)
+      self.end_headers()
+      return
+    body = MANIFEST
+    self.send_response(200)
+    self.send_header('ETag', Handler.etag)
+    if 'gzip' in self.headers.get('Accept-Encoding', ''):
+      body = gzip.compress(body)
+      self.send_header('Content-Encoding', 'gzip')
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, *args):
+    pass
+
+@fixture
+def server():
+  Handler.etag = '"v1"'
+  Handler.failures = 0
+  Handler.requests = []
+  httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+  thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+  thread.start()
+  yield f'http://127.0.0.1:{httpd.server_address[1]}/manifest.json'
+  httpd.shutdown()
+  httpd.server_close()
+
+class TestFetch:
+  def test_gzip(self, server):
+    manifest, headers = fetch(server, lambda file: file.read())
+    assert manifest == MANIFEST
+    assert headers['etag'] == '"v1"'
+    assert Handler.requests[0]['Accept-Encoding'] == 'gzip, deflate'
+
+  def test_not_modified(self, server):
+    assert fetch(server, lambda file: file.read(), etag='"v1"') is None
+    assert Handler.requests[0]['If-None-Match'] == '"v1"'
+
+  def test_retry(self, server):
+    Handler.failures = 2
+    manifest, _ = fetch(server, lambda file: file.read(), backoff=0)
+    assert manifest == MANIFEST
+    assert len(Handler.requests) == 3
+
+  def test_retries_exhausted(self, server):
+    Handler.failures = 5
+    with raises(HTTPError):
+      fetch(server, lambda file: file.read(), retries=1, backoff=0)
+    assert len(Handler.requests) == 2
+
+class TestDbtFromUrl:
+  def test_from_url(self, server):
+    for stream in [False, True]:
+      dbt = Dbt.from_url(server, stream=stream)
+      assert list(model.name for model in dbt.models) == [
+        'users_copy',
+        'orders_copy',
+        'line_items_copy',
+        'products_copy'
+      ]
+      assert dbt.model('orders_copy').primary_key[0].name == 'id'
+
+  def test_from_url_lean(self, server):
+    for stream in [False, True]:
+      dbt = Dbt.from_url(server, stream=stream, lean=True)
+      assert len(dbt.models) == 4
+      assert 'raw_code' not in dbt.model('orders_copy')._model_dict
+      assert dbt.model('orders_copy').primary_key[0].name == 'id'
+
+  def test_from_url_with_catalog(self, server, tmp_path):
+    catalog_path = str(tmp_path / 'catalog.json')
+    with open(catalog_path, 'w') as file:
+      json.dump({'nodes': {'model.jaffle_shop.users_copy': {'columns': {
+        'id': {'type': 'integer', 'index': 1, 'name': 'id', 'comment': None}
+      }}}}, file)
+    dbt = Dbt.from_url(server, catalog=catalog_path, catalog_columns=True)
+    assert dbt.model('users_copy').column('id').type == 'number'
+
+  def test_from_url_async(self, server):
+    async def main():
+      return await asyncio.gather(
+        Dbt.from_url_async(server, timeout=10),
+        Dbt.from_url_async(server, timeout=10)
+      )
+    dbt, same = asyncio.run(main())
+    assert dbt is same
+    assert len(Handler.requests) == 1
+    assert dbt.model('orders_copy').primary_key[0].name == 'id'
+
+  def test_from_manifests_with_url(self, server):
+    """
+    URLs and paths can be mixed; the same project loaded twice isn't duplicated
+    """
+    dbt = Dbt.from_manifests([server, directory_path + '/manifest.json'])
+    assert len(dbt.models) == 4
+    assert dbt.model('orders_copy').primary_key[0].name == 'id'
+
+  def test_from_url_cache(self, server, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    dbt = Dbt.from_url(server, cache_dir=cache_dir)
+    assert dbt.model('orders_copy').primary_key[0].name == 'id'
+
+    dbt = Dbt.from_url(server, cache_dir=cache_dir)
+    assert Handler.requests[1]['If-None-Match'] == '"v1"'
+    assert len(dbt.models) == 4
+    assert dbt.model('orders_copy').primary_key[0].name == 'id'
+
+    # A changed manifest is downloaded again
+    Handler.etag = '"v2"'
+    dbt = Dbt.from_url(server, cache_dir=cache_dir)
+    assert len(dbt.models) == 4
+    assert len(Handler.requests) == 3
+
+  def test_from_url_cache_unreadable_body(self, server, tmp_path):
+    """
+    A snapshot whose body can't be read after a 304 is downloaded again
+    """
+    cache_dir = str(tmp_path / 'cache')
+    Dbt.from_url(server, cache_dir=cache_dir)
+    cache = ManifestCache(cache_dir)
+    snapshot_path = cache._snapshot_path(server)
+    with open(snapshot_path, 'rb') as file:
+      header = file.readline()
+    with open(snapshot_path, 'wb') as file:
+      file.write(header + b'{"truncated')
+
+    dbt = Dbt.from_url(server, cache_dir=cache_dir)
+    assert len(dbt.models) == 4
+    assert 'If-None-Match' not in Handler.requests[2]
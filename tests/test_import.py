@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+# Imported on first use only, so processes that just load a manifest and
+# look up models don't pay for them
+LAZY_MODULES = [
+  'asyncio',
+  'concurrent.futures',
+  'http.client',
+  'importlib.metadata',
+  'logging',
+  'orjson',
+  'pickle',
+  'tempfile',
+  'urllib.request',
+  'yaml',
+]
+
+directory_path = os.path.dirname(os.path.realpath(__file__))
+
+def _run(code: str) -> str:
+  return subprocess.check_output([sys.executable, '-c', code], text=True).strip()
+
+class TestImport:
+  def test_heavy_modules_are_lazy(self):
+    """
+    Importing cube_dbt doesn't import PyYAML, orjson, urllib, and friends
+    """
+    loaded = _run(
+      'import sys, cube_dbt\n'
+      f'print(sorted(name for name in {LAZY_MODULES!r} if name in sys.modules))'
+    )
+    assert loaded == '[]'
+
+  def test_import_time_budget(self):
+    """
+    Generous enough for slow CI machines, see benchmarks/import_time.py
+    for the tighter budget
+    """
+    seconds = min(
+      float(_run('import time; started_at = time.perf_counter(); import cube_dbt; print(time.perf_counter() - started_at)'))
+      for _ in range(3)
+    )
+    assert seconds < 0.25
+
+  def test_dump_loads_yaml_on_demand(self):
+    output = _run(
+      'import sys\n'
+      'from cube_dbt import Dbt\n'
+      f"dbt = Dbt.from_file({directory_path + '/manifest.json'!r})\n"
+      "print('yaml' in sys.modules, 'orjson' in sys.modules)\n"
+      "dbt.render_cubes()\n"
+      "print('yaml' in sys.modules)"
+    )
+    assert output.split('\n') == ['False True', 'True']
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import threading
+import time
+
+from pytest import raises
+from cube_dbt import Dbt
+from cube_dbt.loads import InFlightLoads
+
+directory_path = os.path.dirname(os.path.realpath(__file__))
+manifest_path = directory_path + '/manifest.json'
+
+class TestInFlightLoads:
+  def test_shared_load(self):
+    """
+    Concurrent awaits of the same key share one run
+    """
+    calls = []
+    def load():
+      calls.append(1)
+      return object()
+    async def main():
+      loads = InFlightLoads()
+      return await asyncio.gather(*(loads.run('key', [load]) for _ in range(3)))
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert results[0] is results[1] is results[2]
+
+  def test_unshared_load(self):
+    """
+    Loads with a None key are never shared
+    """
+    calls = []
+    async def main():
+      loads = InFlightLoads()
+      await asyncio.gather(*(loads.run(None, [lambda: calls.append(1)]) for _ in range(2)))
+    asyncio.run(main())
+    assert len(calls) == 2
+
+  def test_steps(self):
+    async def main():
+      return await InFlightLoads().run('key', [lambda: 1, lambda value: value + 1])
+    assert asyncio.run(main()) == 2
+
+  def test_timeout_cancels_later_steps(self):
+    """
+    A timed out load with no other waiters doesn't run its next steps
+    """
+    release = threading.Event()
+    calls = []
+    async def main():
+      loads = InFlightLoads()
+      steps = [lambda: release.wait(5), lambda _: calls.append(1)]
+      with raises(asyncio.TimeoutError):
+        await loads.run('key', steps, timeout=0.05)
+      release.set()
+      await asyncio.sleep(0.1)
+      assert loads._loads == {}
+    asyncio.run(main())
+    assert calls == []
+
+  def test_retry_after_timeout(self):
+    """
+    An await right after a timeout starts a new load
+    """
+    async def main():
+      loads = InFlightLoads()
+      with raises(asyncio.TimeoutError):
+        await loads.run('key', [lambda: time.sleep(0.2) or 'slow'], timeout=0.05)
+      return await loads.run('key', [lambda: time.sleep(0.2) or 'retried'], timeout=5)
+    assert asyncio.run(main()) == 'retried'
+
+  def test_cancel_with_other_waiters(self):
+    """
+    Cancelling one await doesn't cancel a load others still wait for
+    """
+    release = threading.Event()
+    async def main():
+      loads = InFlightLoads()
+      first = asyncio.ensure_future(loads.run('key', [lambda: release.wait(5) and 'done']))
+      second = asyncio.ensure_future(loads.run('key', [lambda: None]))
+      await asyncio.sleep(0.05)
+      first.cancel()
+      release.set()
+      return await second
+    assert asyncio.run(main()) == 'done'
+
+  def test_error(self):
+    def load():
+      raise ValueError('broken')
+    async def main():
+      loads = InFlightLoads()
+      with raises(ValueError):
+        await loads.run('key', [load])
+      assert loads._loads == {}
+    asyncio.run(main())
+
+
+class TestDbtAsync:
+  def test_from_file_async(self):
+    async def main():
+      return await asyncio.gather(
+        Dbt.from_file_async(manifest_path),
+        Dbt.from_file_async(manifest_path),
+        Dbt.from_file_async(manifest_path, lean=True)
+      )
+    dbt, same, lean = asyncio.run(main())
+    assert dbt is same
+    assert lean is not dbt
+    assert dbt._index.test_index is not None
+    assert len(lean.models) == 4
+    assert dbt.model('orders_copy').primary_key[0].name == 'id'
+
+  def test_from_file_async_file_object(self):
+    async def main():
+      with open(manifest_path, 'rb') as file:
+        return await Dbt.from_file_async(file, stream=True)
+    assert len(asyncio.run(main()).models) == 4
@@ -0,0 +1,86 @@
+import io
+import json
+
+from pytest import raises
+from cube_dbt.manifest import ManifestReader, intern_node, stream_manifest
+
+MANIFEST = {
+  'metadata': {'adapter_type': 'postgres'},
+  'macros': {
+    'macro.a': {'name': 'a', 'arguments': [1, 2.5, None, True]}
+  },
+  'nodes': {
+    'model.p.a': {'name': 'a', 'resource_type': 'model', 'description': 'Ünïcödé ☃'},
+    'seed.p.b': {'name': 'b', 'resource_type': 'seed'},
+    'model.p.c': {'name': 'c', 'resource_type': 'model', 'columns': {}}
+  },
+  'parent_map': {'model.p.a': []},
+  'selectors': [],
+  'group_map': {}
+}
+
+class TestStreamManifest:
+  def test_small_chunks(self):
+    """
+    Values split across read boundaries are decoded correctly
+    """
+    data = json.dumps(MANIFEST, indent=2, ensure_ascii=False).encode('utf-8')
+    for chunk_size in [1, 2, 7, 64]:
+      manifest = stream_manifest(io.BytesIO(data), chunk_size=chunk_size)
+      assert manifest == {'nodes': MANIFEST['nodes'], 'metadata': MANIFEST['metadata']}
+
+  def test_select(self):
+    """
+    Nodes rejected by `select` are not kept
+    """
+    data = json.dumps(MANIFEST)
+    manifest = stream_manifest(
+      io.StringIO(data),
+      select=lambda node: node['name'] if node['resource_type'] == 'model' else None
+    )
+    assert manifest['nodes'] == {'model.p.a': 'a', 'model.p.c': 'c'}
+
+  def test_numbers_at_buffer_end(self):
+    reader = ManifestReader(io.StringIO('[12345, 6]'), chunk_size=3)
+    reader.expect('[')
+    assert reader.value() == 12345
+
+  def test_numbers_split_at_every_offset(self):
+    data = b'{"x": [1.5, 22.25, 3e10, -4.5E-3, 0, -7, 1e+2], "nodes": {"a": {"n": 12.0}}}'
+    numbers = [1.5, 22.25, 3e10, -4.5e-3, 0, -7, 100.0]
+    for chunk_size in range(1, len(data) + 1):
+      # Skipped sections are walked one value at a time
+      assert stream_manifest(io.BytesIO(data), chunk_size=chunk_size) == {'nodes': {'a': {'n': 12.0}}}
+      manifest = stream_manifest(io.BytesIO(data), sections=('x',), chunk_size=chunk_size)
+      assert manifest == {'x': numbers, 'nodes': {'a': {'n': 12.0}}}
+
+      reader = ManifestReader(io.BytesIO(data[6:]), chunk_size=chunk_size)
+      reader.expect('[')
+      for number in numbers:
+        assert reader.value() == number
+        reader.peek()
+        reader._pos += 1
+
+  def test_invalid(self):
+    with raises(ValueError):
+      stream_manifest(io.StringIO('{"nodes": {"a": 1'))
+    with raises(ValueError):
+      stream_manifest(io.StringIO('[]'))
+
+class TestInternNode:
+  def test_repeated_strings_are_shared(self):
+    nodes = json.loads(json.dumps([
+      {'config': {'tags': ['cube']}, 'columns': {'id': {'name': 'id', 'data_type': 'integer', 'tags': ['primary_key']}}}
+    ] * 2))
+    for node in nodes:
+      intern_node(node)
+    first, second = nodes[0], nodes[1]
+    assert first['config']['tags'][0] is second['config']['tags'][0]
+    assert first['columns']['id']['name'] is second['columns']['id']['name']
+    assert first['columns']['id']['data_type'] is second['columns']['id']['data_type']
+    assert first['columns']['id']['tags'][0] is second['columns']['id']['tags'][0]
+
+  def test_missing_and_null_values(self):
+    node = {'columns': {'id': {'name': 'id', 'data_type': None}}}
+    intern_node(node)
+    assert node == {'columns': {'id': {'name': 'id', 'data_type': None}}}
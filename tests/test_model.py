@@ -475,3 +475,56 @@ class TestModel:
     # Should only detect id from constraints, not account_id from tests
     assert len(model.primary_key) == 1
     assert model.primary_key[0].name == "id"
+
+  def test_column(self):
+    model_dict = {
+      'name': 'model',
+      'columns': {
+        'id': {
+          'name': 'id',
+          'data_type': 'numeric',
+          'tags': []
+        },
+        'status': {
+          'name': 'status',
+          'data_type': None,
+          'tags': []
+        }
+      }
+    }
+    model = Model(model_dict)
+    assert model.column('status') is model.columns[1]
+    with raises(StopIteration):
+      model.column('missing')
+
+  def test_as_cube_with_dimensions(self):
+    model_dict = {
+      'relation_name': '"db"."schema"."table"',
+      'name': 'model',
+      'description': '',
+      'columns': {
+        'id': {
+          'name': 'id',
+          'description': '',
+          'meta': {},
+          'data_type': 'numeric',
+          'tags': []
+        }
+      }
+    }
+    model = Model(model_dict)
+    assert model._as_cube_with_dimensions() == {
+      'name': 'model',
+      'sql_table': '"db"."schema"."table"',
+      'dimensions': [
+        {
+          'name': 'id',
+          'sql': 'id',
+          'type': 'number'
+        }
+      ]
+    }
+    assert model._as_cube_with_dimensions(skip=['id']) == {
+      'name': 'model',
+      'sql_table': '"db"."schema"."table"'
+    }
@@ -0,0 +1,91 @@
+import os
+import shutil
+import threading
+import time
+
+from cube_dbt import Dbt
+from cube_dbt.registry import REGISTRY, Registry
+
+directory_path = os.path.dirname(os.path.realpath(__file__))
+
+def _wait_for(condition, timeout: float=5.0) -> None:
+  deadline = time.monotonic() + timeout
+  while not condition() and time.monotonic() < deadline:
+    time.sleep(0.01)
+
+class TestRegistry:
+  def test_load_once(self):
+    """
+    Concurrent first calls wait for a single load
+    """
+    calls = []
+    def load():
+      calls.append(1)
+      time.sleep(0.05)
+      return object()
+    registry = Registry()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get('key', load))) for _ in range(4)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+  def test_stale_while_revalidate(self):
+    release = threading.Event()
+    values = iter(['first', 'second'])
+    def load():
+      value = next(values)
+      if value == 'second':
+        release.wait(5)
+      return value
+    registry = Registry()
+    assert registry.get('key', load, ttl=0) == 'first'
+    # Stale: served right away while the refresh is blocked
+    assert registry.get('key', load, ttl=0) == 'first'
+    assert registry.get('key', load, ttl=0) == 'first'
+    release.set()
+    _wait_for(lambda: registry.get('key', load) == 'second')
+    assert registry.get('key', load) == 'second'
+
+  def test_no_refresh_within_ttl(self):
+    calls = []
+    def load():
+      calls.append(1)
+      return len(calls)
+    registry = Registry()
+    assert registry.get('key', load, ttl=60) == 1
+    assert registry.get('key', load, ttl=60) == 1
+    assert len(calls) == 1
+
+  def test_failed_refresh_keeps_value(self):
+    def fail():
+      raise OSError('unreachable')
+    registry = Registry()
+    registry.get('key', lambda: 'value')
+    assert registry.get('key', fail, ttl=0) == 'value'
+    _wait_for(lambda: registry.error('key') is not None)
+    assert isinstance(registry.error('key'), OSError)
+    assert registry.get('key', fail) == 'value'
+
+
+class TestDbtShared:
+  def test_shared(self, tmp_path):
+    manifest_path = str(tmp_path / 'manifest.json')
+    shutil.copyfile(directory_path + '/manifest.json', manifest_path)
+    try:
+      dbt = Dbt.shared(manifest_path, ttl=60)
+      assert Dbt.shared(manifest_path, ttl=60) is dbt
+      assert dbt._index.nodes is not None
+      view = Dbt.shared(manifest_path, ttl=60, names=['orders_copy'])
+      assert view._index is dbt._index
+      assert [model.name for model in view.models] == ['orders_copy']
+
+      refreshed = lambda: Dbt.shared(manifest_path) is not dbt
+      assert Dbt.shared(manifest_path, ttl=0) is dbt
+      _wait_for(refreshed)
+      assert refreshed()
+    finally:
+      REGISTRY.clear()
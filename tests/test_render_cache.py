@@ -0,0 +1,96 @@
+import os
+
+from cube_dbt import Model
+from cube_dbt.render_cache import RenderCache
+
+MODEL = {
+  'name': 'orders',
+  'database': 'db',
+  'schema': 'public',
+  'description': 'Orders',
+  'columns': {
+    'id': {'name': 'id', 'data_type': 'integer', 'description': 'Id', 'meta': {}, 'tags': []},
+    'status': {'name': 'status', 'data_type': 'text', 'description': '', 'meta': {}, 'tags': []}
+  }
+}
+
+class TestRenderCache:
+  def test_put_and_get(self, tmp_path):
+    cache = RenderCache(str(tmp_path))
+    assert cache.get('ab' * 20) is None
+    cache.put('ab' * 20, 'fragment')
+    assert cache.get('ab' * 20) == 'fragment'
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert os.path.exists(tmp_path / 'ab' / ('ab' * 20))
+
+  def test_evicts_least_recently_used(self, tmp_path):
+    cache = RenderCache(str(tmp_path), max_bytes=25)
+    cache.put('aa', 'x' * 10)
+    cache.put('bb', 'x' * 10)
+    os.utime(tmp_path / 'aa' / 'aa', ns=(1, 1))
+    os.utime(tmp_path / 'bb' / 'bb', ns=(2, 2))
+    assert cache.get('aa') == 'x' * 10
+    cache.put('cc', 'x' * 10)
+    # `aa` was just read, so `bb` is the least recently used
+    assert cache.get('bb') is None
+    assert cache.get('aa') == 'x' * 10
+    assert cache.get('cc') == 'x' * 10
+
+  def test_overwrite_keeps_size(self, tmp_path):
+    """
+    Putting a key again only counts the difference in size, so repeated
+    puts don't trigger evictions
+    """
+    cache = RenderCache(str(tmp_path), max_bytes=25)
+    cache.put('aa', 'x' * 10)
+    cache.put('bb', 'x' * 10)
+    cache.put('bb', 'x' * 12)
+    assert cache._size == 22
+    cache.put('bb', 'x' * 10)
+    assert cache._size == 20
+    os.utime(tmp_path / 'aa' / 'aa', ns=(1, 1))
+    cache.put('bb', 'x' * 10)
+    assert cache.get('aa') == 'x' * 10
+
+  def test_model_renders_from_cache(self, tmp_path):
+    """
+    A second render is read from disk instead of being rendered again
+    """
+    cache = RenderCache(str(tmp_path))
+    expected = Model(dict(MODEL)).as_cube()
+    assert Model(dict(MODEL), render_cache=cache).as_cube() == expected
+
+    for root, _, files in os.walk(tmp_path):
+      for name in files:
+        with open(os.path.join(root, name), 'w') as file:
+          file.write('cached')
+    assert Model(dict(MODEL), render_cache=cache).as_cube() == 'cached'
+
+  def test_key_follows_content(self, tmp_path):
+    """
+    Changing the model, its tests, or the arguments renders a new fragment
+    """
+    cache = RenderCache(str(tmp_path))
+    Model(dict(MODEL), render_cache=cache).as_dimensions()
+    assert cache.misses == 1
+
+    changed = dict(MODEL, description='All orders')
+    Model(changed, render_cache=cache).as_dimensions()
+    Model(dict(MODEL), {'id': ['unique']}, render_cache=cache).as_dimensions()
+    dimensions = Model(dict(MODEL), render_cache=cache).as_dimensions(skip=['status'])
+    assert cache.misses == 4
+    assert 'status' not in dimensions
+    Model(dict(MODEL), render_cache=cache).as_dimensions()
+    assert cache.hits == 1
+
+class TestDbtRenderCache:
+  def test_use_render_cache(self, tmp_path):
+    from cube_dbt import Dbt
+    dbt = Dbt.from_file('./tests/manifest.json')
+    expected = dbt.model('orders_copy').as_cube()
+    dbt.use_render_cache(str(tmp_path))
+    assert dbt.model('orders_copy').as_cube() == expected
+    render_cache = dbt.model('orders_copy')._render_cache
+    assert dbt.filter(tags=['cube']).model('products_copy')._render_cache is render_cache
+    assert dbt.model('orders_copy').as_cube() == expected
+    assert render_cache.hits == 1
@@ -0,0 +1,82 @@
+import gc
+import os
+import subprocess
+import sys
+
+from cube_dbt import Dbt
+from cube_dbt.shared import SharedManifest
+
+directory_path = os.path.dirname(os.path.realpath(__file__))
+src_path = os.path.join(os.path.dirname(directory_path), 'src')
+
+_ATTACH = '''
+import sys
+from cube_dbt import Dbt
+dbt = Dbt.attach(sys.argv[1], tags=sys.argv[2:])
+print(','.join(model.name for model in dbt.models))
+print(dbt.render_cubes())
+'''
+
+def _attach(name: str, *tags: str) -> str:
+  env = {**os.environ, 'PYTHONPATH': src_path}
+  return subprocess.check_output([sys.executable, '-c', _ATTACH, name, *tags], text=True, env=env)
+
+class TestShared:
+  def test_attach(self):
+    """
+    Another process loads the shared snapshot and renders the same cubes
+    """
+    dbt = Dbt.from_file(directory_path + '/manifest.json')
+    with dbt.share() as shared:
+      output = _attach(shared.name)
+      assert output.splitlines()[0] == 'users_copy,orders_copy,line_items_copy,products_copy'
+      assert output.split('\n', 1)[1] == dbt.render_cubes() + '\n'
+      # The segment outlives processes that attached to it
+      assert _attach(shared.name).splitlines()[0] == 'users_copy,orders_copy,line_items_copy,products_copy'
+
+  def test_attach_filtered(self):
+    dbt = Dbt.from_file(directory_path + '/manifest.json')
+    with dbt.share() as shared:
+      tag = dbt.model('orders_copy')._model_dict['config']['tags']
+      assert _attach(shared.name, *tag).splitlines()[0] == ','.join(
+        model.name for model in dbt.filter(tags=tag).models
+      )
+
+  def test_attach_forked(self):
+    """
+    A forked worker shares the publisher's resource tracker, and attaching
+    mustn't register the segment with it
+    """
+    dbt = Dbt.from_file(directory_path + '/manifest.json')
+    with dbt.share() as shared:
+      pid = os.fork()
+      if pid == 0:
+        os._exit(0 if len(Dbt.attach(shared.name).models) == 4 else 1)
+      _, status = os.waitpid(pid, 0)
+      assert os.waitstatus_to_exitcode(status) == 0
+      assert _attach(shared.name).splitlines()[0] == 'users_copy,orders_copy,line_items_copy,products_copy'
+
+  def test_unsupported_format(self):
+    with SharedManifest.publish({'manifest': {'nodes': {}}, 'test_index': {}}) as shared:
+      shared._segment.buf[8:12] = b'\0\0\0\0'
+      env = {**os.environ, 'PYTHONPATH': src_path}
+      result = subprocess.run([sys.executable, '-c', _ATTACH, shared.name], capture_output=True, text=True, env=env)
+      assert result.returncode != 0
+      assert 'ValueError: Shared manifest' in result.stderr
+
+
+class TestPrefork:
+  def test_prefork(self):
+    dbt = Dbt.from_file(directory_path + '/manifest.json')
+    try:
+      assert dbt.prefork() is dbt
+      assert gc.get_freeze_count() > 0
+      assert all(model._columns is not None for model in dbt.models)
+      assert dbt.model('orders_copy').column('id').type == 'number'
+      pid = os.fork()
+      if pid == 0:
+        os._exit(0 if len(dbt.models) == 4 else 1)
+      _, status = os.waitpid(pid, 0)
+      assert os.waitstatus_to_exitcode(status) == 0
+    finally:
+      gc.unfreeze()
@@ -0,0 +1,56 @@
+import logging
+
+from cube_dbt import Dbt, stats
+
+class TestStats:
+  def setup_method(self):
+    self.stats = stats.enable()
+
+  def teardown_method(self):
+    stats.disable()
+
+  def test_stages_and_counters(self):
+    dbt = Dbt.from_file('./tests/manifest.json')
+    dbt._index.type_resolver.reset()
+    dbt.models
+    dbt.render_cubes()
+    assert set(self.stats.timings) >= {
+      'from_file', 'build_index', 'init_models', 'dump', 'render_cubes'
+    }
+    assert self.stats.calls['from_file'] == 1
+    counters = self.stats.counters
+    assert counters['models'] == 8
+    assert counters['bytes_read'] > 0
+    assert counters['nodes'] > counters['models'] / 2
+    assert counters['columns'] > 0
+    assert self.stats.hit_rate('fast_dump') == 1.0
+    assert 0 < self.stats.hit_rate('type_cache') < 1
+    assert self.stats.hit_rate('render_cache') is None
+    assert self.stats.as_dict()['hit_rates']['type_cache'] == self.stats.hit_rate('type_cache')
+
+  def test_manifest_cache_hit_rate(self, tmp_path):
+    Dbt.from_file('./tests/manifest.json', cache_dir=str(tmp_path))
+    Dbt.from_file('./tests/manifest.json', cache_dir=str(tmp_path))
+    assert self.stats.hit_rate('manifest_cache') == 0.5
+
+  def test_hook(self, caplog):
+    """
+    Hooks receive each finished stage with its own counters
+    """
+    events = []
+    stats.enable(lambda stage, seconds, counters: events.append((stage, dict(counters))))
+    Dbt.from_file('./tests/manifest.json').models
+    assert [stage for stage, _ in events] == ['from_file', 'build_index', 'init_models']
+    assert events[-1][1] == {'models': 4}
+
+    with caplog.at_level(logging.DEBUG, logger='cube_dbt'):
+      stats.enable(stats.logging_hook())
+      Dbt.from_file('./tests/manifest.json')
+    assert caplog.messages[0].startswith('from_file took ')
+
+  def test_disabled(self):
+    stats.disable()
+    assert stats.current is None
+    Dbt.from_file('./tests/manifest.json').render_cubes()
+    assert self.stats.timings == {}
+    assert stats.disable() is None
@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+
+from cube_dbt import Dbt
+from cube_dbt.watch import ManifestWatcher
+
+directory_path = os.path.dirname(os.path.realpath(__file__))
+
+def _write(manifest_path: str, manifest: dict, mtime_ns: int) -> None:
+  with open(manifest_path, 'w') as file:
+    json.dump(manifest, file)
+  # Explicit mtimes, so changes are seen regardless of the filesystem's resolution
+  os.utime(manifest_path, ns=(mtime_ns, mtime_ns))
+
+def _manifest() -> dict:
+  with open(directory_path + '/manifest.json') as file:
+    return json.load(file)
+
+class TestWatch:
+  def test_poll(self, tmp_path):
+    manifest_path = str(tmp_path / 'manifest.json')
+    manifest = _manifest()
+    _write(manifest_path, manifest, 1_000_000_000)
+
+    for options in [{}, {'lean': True}, {'stream': True}]:
+      watcher = ManifestWatcher(manifest_path, **options)
+      calls = []
+      watcher.on_change(lambda dbt, diff: calls.append((dbt, diff)))
+      first = watcher.dbt
+      orders = first.model('orders_copy')
+      users = first.model('users_copy')
+      assert watcher.poll() is None
+
+      manifest['nodes']['model.jaffle_shop.orders_copy']['description'] = 'Orders, changed'
+      del manifest['nodes']['model.jaffle_shop.products_copy']
+      _write(manifest_path, manifest, watcher._signature[0] + 1_000_000_000)
+      diff = watcher.poll()
+      assert diff.changed == {'model.jaffle_shop.orders_copy'}
+      assert diff.removed == {'model.jaffle_shop.products_copy'}
+      assert diff.added == set()
+      assert calls == [(watcher.dbt, diff)]
+
+      second = watcher.dbt
+      assert second is not first
+      assert second.model('users_copy') is users
+      assert second.model('orders_copy') is not orders
+      assert second.model('orders_copy').description == 'Orders, changed'
+      assert [model.name for model in second.models] == ['users_copy', 'orders_copy', 'line_items_copy']
+      assert second.state() == Dbt.from_file(manifest_path).state()
+      manifest = _manifest()
+      _write(manifest_path, manifest, 1_000_000_000)
+
+  def test_tests_change(self, tmp_path):
+    """
+    Models whose tests changed are rebuilt too
+    """
+    manifest_path = str(tmp_path / 'manifest.json')
+    manifest = _manifest()
+    _write(manifest_path, manifest, 1_000_000_000)
+    watcher = ManifestWatcher(manifest_path)
+    tests = [
+      key for key, node in manifest['nodes'].items()
+      if node['resource_type'] == 'test' and 'model.jaffle_shop.orders_copy' in node['depends_on']['nodes']
+    ]
+    for key in tests:
+      del manifest['nodes'][key]
+    _write(manifest_path, manifest, 2_000_000_000)
+    assert watcher.poll().changed == {'model.jaffle_shop.orders_copy'}
+
+  def test_partial_write(self, tmp_path):
+    manifest_path = str(tmp_path / 'manifest.json')
+    _write(manifest_path, _manifest(), 1_000_000_000)
+    watcher = ManifestWatcher(manifest_path)
+    first = watcher.dbt
+    orders = first.model('orders_copy')
+    with open(manifest_path, 'w') as file:
+      file.write('{"nodes": {')
+    os.utime(manifest_path, ns=(2_000_000_000, 2_000_000_000))
+    assert watcher.poll() is None
+    assert isinstance(watcher.error, ValueError)
+    assert watcher.dbt is first
+
+    _write(manifest_path, _manifest(), 3_000_000_000)
+    assert not watcher.poll()
+    assert watcher.error is None
+    assert watcher.dbt.model('orders_copy') is orders
+
+  def test_watch(self, tmp_path):
+    manifest_path = str(tmp_path / 'manifest.json')
+    manifest = _manifest()
+    _write(manifest_path, manifest, 1_000_000_000)
+    reloaded = threading.Event()
+    with Dbt.watch(manifest_path, lambda dbt, diff: reloaded.set(), interval=0.01) as watcher:
+      manifest['nodes']['model.jaffle_shop.users_copy']['description'] = 'Users, changed'
+      _write(manifest_path, manifest, 2_000_000_000)
+      assert reloaded.wait(5)
+      assert watcher.dbt.model('users_copy').description == 'Users, changed'
+    assert watcher._thread is None
+
+  def test_reuse(self, tmp_path):
+    """
+    Unchanged models keep their previous node and fingerprint, and
+    changes to keys cube_dbt doesn't read don't count
+    """
+    manifest_path = str(tmp_path / 'manifest.json')
+    manifest = _manifest()
+    _write(manifest_path, manifest, 1_000_000_000)
+    watcher = ManifestWatcher(manifest_path)
+    previous = watcher.dbt._index
+    state = watcher.dbt.state()
+
+    manifest['nodes']['model.jaffle_shop.users_copy']['compiled_code'] = 'select 1'
+    manifest['nodes']['model.jaffle_shop.orders_copy']['columns']['id']['description'] = 'Changed'
+    _write(manifest_path, manifest, 2_000_000_000)
+    diff = watcher.poll()
+    assert diff.changed == {'model.jaffle_shop.orders_copy'}
+    index = watcher.dbt._index
+    assert index.nodes['model.jaffle_shop.products_copy'] is previous.nodes['model.jaffle_shop.products_copy']
+    assert index.nodes['model.jaffle_shop.users_copy'] is previous.nodes['model.jaffle_shop.users_copy']
+    assert index.fingerprints['model.jaffle_shop.products_copy'] == state['model.jaffle_shop.products_copy']
+    assert watcher.dbt.state() == Dbt.from_file(manifest_path).state()